@@ -1,8 +1,42 @@
+import argparse
+import sys
+
+from smallcalc import batch
+from smallcalc import columnar
 from smallcalc import calc_parser as cpar
 from smallcalc import calc_visitor as cvis
 
+
+def run(path):
+    p = cpar.PrattParser()
+    v = cvis.CalcVisitor()
+
+    with open(path) as f:
+        p.lexer.load(f.read())
+
+    for res in v.visit(p.parse_program()):
+        print(res)
+
+
+def run_parallel(path, jobs):
+    for res in batch.evaluate_file(path, jobs):
+        print(res)
+
+
+def run_formula(formula, input, output, columns=None, bindings=None,
+                binary=False):
+    if binary:
+        info = columnar.evaluate_binary(
+            formula, input, output, columns, bindings)
+    else:
+        info = columnar.evaluate_csv(
+            formula, input, output, columns, bindings)
+    print('{} rows in {:.3f}s ({:.0f} rows/s)'.format(
+        info.rows, info.seconds, info.rows_per_second), file=sys.stderr)
+
+
 def main():
-    p = cpar.CalcParser()
+    p = cpar.PrattParser()
     v = cvis.CalcVisitor()
 
     while True:
@@ -11,7 +45,7 @@ def main():
             p.lexer.load(text)
 
             node = p.parse_line()
-            res = v.visit(node.asdict())
+            res = v.visit(node)
 
             print(res)
 
@@ -26,4 +60,40 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Small interpreter')
+    parser.add_argument('script', nargs='?',
+                        help='file to run instead of reading from the prompt')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of processes used to run the script')
+    parser.add_argument('-e', '--evaluate', metavar='FORMULA',
+                        help='formula to evaluate on each row of the input')
+    parser.add_argument('-i', '--input',
+                        help='CSV file with a header, or raw binary file '
+                             'with --binary')
+    parser.add_argument('-o', '--output',
+                        help='file the results of the formula are written to')
+    parser.add_argument('--binary', action='store_true',
+                        help='read the input as raw binary records')
+    parser.add_argument('--columns',
+                        help='types of the columns, e.g. x:int64,y:float64; '
+                             'CSV columns are floats by default, raw binary '
+                             'inputs need all their columns listed')
+    parser.add_argument('-b', '--bind', action='append', default=[],
+                        metavar='VARIABLE=COLUMN',
+                        help='bind a variable to a column with another name')
+    args = parser.parse_args()
+
+    if args.evaluate:
+        if not args.input or not args.output:
+            parser.error('--evaluate requires --input and --output')
+        if args.binary and not args.columns:
+            parser.error('--binary requires --columns')
+        bindings = dict(binding.split('=', 1) for binding in args.bind)
+        run_formula(args.evaluate, args.input, args.output,
+                    args.columns, bindings, args.binary)
+    elif args.script and args.jobs != 1:
+        run_parallel(args.script, args.jobs)
+    elif args.script:
+        run(args.script)
+    else:
+        main()
@@ -18,6 +18,9 @@ setup(
                  'smallcalc'},
     include_package_data=True,
     install_requires=[],
+    extras_require={
+        'vectorized': ['numpy'],
+    },
     license="MIT license",
     zip_safe=False,
     keywords='smallcalc',
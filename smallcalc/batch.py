@@ -0,0 +1,42 @@
+import concurrent.futures
+import os
+
+from .calc_parser import PrattParser
+from .calc_visitor import CalcVisitor
+
+
+def evaluate_chunk(lines):
+    """
+    Parses and evaluates a list of lines as a single program,
+    returning the result of each statement.
+    """
+    parser = PrattParser()
+    parser.lexer.load('\n'.join(lines))
+    return CalcVisitor().visit(parser.parse_program())
+
+
+def evaluate_lines(lines, jobs=None, chunk_size=1000):
+    """
+    Evaluates lines in chunks on a pool of `jobs` processes, returning
+    the results in input order. Lines are independent only if nothing
+    is assigned, otherwise they are evaluated in order in this process.
+    """
+    lines = list(lines)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or any('=' in line for line in lines):
+        return evaluate_chunk(lines)
+
+    chunks = [
+        lines[start:start + chunk_size]
+        for start in range(0, len(lines), chunk_size)
+    ]
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        for chunk_results in executor.map(evaluate_chunk, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+def evaluate_file(path, jobs=None, chunk_size=1000):
+    with open(path) as f:
+        return evaluate_lines(f.read().split('\n'), jobs, chunk_size)
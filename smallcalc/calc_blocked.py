@@ -0,0 +1,177 @@
+import collections
+import time
+
+from . import calc_parser as cpar
+from . import calc_vm
+from .calc_vectorized import OPERATIONS, numpy
+
+# Rows evaluated at a time; a block of 64 bit values fits in the L2 cache
+BLOCK_SIZE = 4096
+
+BINARY_OPERATORS = {
+    opcode: operator
+    for operator, opcode in calc_vm.BINARY_OPCODES.items()
+}
+
+BlockInfo = collections.namedtuple(
+    'BlockInfo', ['rows', 'blocks', 'seconds', 'rows_per_second'])
+
+
+def _columns(columns):
+    """
+    Converts the columns to arrays, returning them and the number of
+    rows. An expression without variables is evaluated for one row.
+    """
+    columns = {
+        name: numpy.asarray(values) for name, values in columns.items()
+    }
+    lengths = set(len(values) for values in columns.values())
+    if len(lengths) > 1:
+        raise ValueError('Columns have different lengths')
+    return columns, lengths.pop() if lengths else 1
+
+
+class BlockedEvaluator:
+    """
+    Evaluates an expression over columns of values, one block of rows
+    at a time. The expression is compiled once to stack machine code,
+    which is run on each block writing the result of every operation
+    into a scratch buffer reserved for its stack slot. Peak memory
+    depends on the block size and the depth of the expression, not
+    on the number of rows.
+
+    Values and types are the same as VectorizedVisitor, except that
+    integer powers are computed as floats unless the exponent is a
+    non-negative constant, as each buffer has a fixed type.
+    """
+
+    def __init__(self, node, block_size=BLOCK_SIZE):
+        if numpy is None:
+            raise RuntimeError('Blocked evaluation requires NumPy')
+        if isinstance(node, (cpar.AssignmentNode, cpar.ProgramNode)):
+            raise ValueError('Only expressions can be evaluated in blocks')
+        self.program = calc_vm.Program(node)
+        self.block_size = block_size
+        self.rows = 0
+        self.blocks = 0
+        self.seconds = 0.0
+
+    def _result_dtype(self, opcode, operands):
+        dtype = numpy.result_type(*operands)
+        if opcode == calc_vm.POW and dtype.kind in 'iu':
+            right = operands[1]
+            if isinstance(right, numpy.ndarray) or right < 0:
+                return numpy.dtype(float)
+        return dtype
+
+    def _plan(self, columns):
+        """
+        Turns the code into a list of steps, folding the operations
+        on constants and allocating the scratch buffers. Each step is
+        (opcode, argument, buffer) and each stack item is
+        (value, dtype, is_float), where dtype is None for constants.
+        """
+        code = self.program.code
+        buffers = {}
+        steps = []
+        stack = []
+        for pc in range(0, len(code), 2):
+            opcode = code[pc]
+            argument = code[pc + 1]
+            if opcode == calc_vm.PUSH_CONSTANT:
+                value, is_float = self.program.constants[argument]
+                stack.append((value, None, is_float))
+                steps.append((opcode, value, None))
+            elif opcode == calc_vm.LOAD_VARIABLE:
+                column = columns[self.program.names[argument]]
+                stack.append((column, column.dtype, column.dtype.kind == 'f'))
+                steps.append((opcode, column, None))
+            elif opcode == calc_vm.RESULT:
+                break
+            else:
+                if opcode == calc_vm.NEG:
+                    operation = numpy.negative
+                    operands = [stack.pop()]
+                else:
+                    operation = OPERATIONS[BINARY_OPERATORS[opcode]]
+                    right = stack.pop()
+                    operands = [stack.pop(), right]
+                values = [operand[0] for operand in operands]
+                is_float = any(operand[2] for operand in operands)
+
+                if all(operand[1] is None for operand in operands):
+                    # All operands are constants, so is the result
+                    value = operation(*values)
+                    del steps[-len(operands):]
+                    steps.append((calc_vm.PUSH_CONSTANT, value, None))
+                    stack.append((value, None, is_float))
+                    continue
+
+                dtype = self._result_dtype(opcode, values)
+                key = (len(stack), dtype)
+                if key not in buffers:
+                    buffers[key] = numpy.empty(self.block_size, dtype)
+                steps.append((opcode, operation, buffers[key]))
+                stack.append((buffers[key], dtype, is_float))
+
+        value, dtype, is_float = stack.pop()
+        return steps, 'float' if is_float else 'integer'
+
+    def _run(self, steps, start, end):
+        values = []
+        for opcode, argument, buffer in steps:
+            if opcode == calc_vm.PUSH_CONSTANT:
+                values.append(argument)
+            elif opcode == calc_vm.LOAD_VARIABLE:
+                values.append(argument[start:end])
+            elif opcode == calc_vm.NEG:
+                values[-1] = argument(values[-1], out=buffer[:end - start])
+            else:
+                right = values.pop()
+                values[-1] = argument(
+                    values[-1], right, out=buffer[:end - start])
+        return numpy.broadcast_to(values.pop(), (end - start,))
+
+    def iter_blocks(self, **columns):
+        """
+        Returns the type of the result and a generator of its blocks.
+        Each block is only valid until the next one is generated.
+        """
+        columns, rows = _columns(columns)
+        steps, type = self._plan(columns)
+
+        def blocks():
+            for start in range(0, rows, self.block_size):
+                end = min(start + self.block_size, rows)
+                started = time.perf_counter()
+                block = self._run(steps, start, end)
+                self.seconds += time.perf_counter() - started
+                self.rows += end - start
+                self.blocks += 1
+                yield block
+
+        return type, blocks()
+
+    def evaluate(self, **columns):
+        """
+        Evaluates the expression, returning an array with one value
+        per row and the type of the result.
+        """
+        columns, rows = _columns(columns)
+        type, blocks = self.iter_blocks(**columns)
+        results = numpy.empty(0)
+        start = 0
+        for block in blocks:
+            if start == 0:
+                results = numpy.empty(rows, block.dtype)
+            results[start:start + len(block)] = block
+            start += len(block)
+        return results, type
+
+    def info(self):
+        rate = self.rows / self.seconds if self.seconds else 0.0
+        return BlockInfo(self.rows, self.blocks, self.seconds, rate)
+
+
+def evaluate_blocked(node, block_size=BLOCK_SIZE, **columns):
+    return BlockedEvaluator(node, block_size).evaluate(**columns)
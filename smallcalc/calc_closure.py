@@ -0,0 +1,166 @@
+from . import calc_parser as cpar
+from .calc_visitor import OPERATIONS
+
+# Marks the negation of the expression below it on the stack
+_NEGATION = object()
+
+
+def _constant(value):
+    return lambda environment: value
+
+
+def _variable(name):
+    return lambda environment: environment[name]['value']
+
+
+def _negation(content):
+    return lambda environment: -content(environment)
+
+
+def _operation(function, left, right):
+    return lambda environment: function(left(environment), right(environment))
+
+
+def _chain(first, operations):
+    """
+    A left associative chain of operations, e.g. 1 + 2 - 3 + 4, as a
+    loop over (function, operand) pairs instead of nested closures.
+    """
+    if not operations:
+        return first
+    if len(operations) == 1:
+        function, operand = operations[0]
+        return _operation(function, first, operand)
+
+    def chain(environment):
+        value = first(environment)
+        for function, operand in operations:
+            value = function(value, operand(environment))
+        return value
+
+    return chain
+
+
+def _type(is_float, variables):
+    if is_float:
+        return _constant('float')
+    if not variables:
+        return _constant('integer')
+
+    variables = sorted(variables)
+
+    def type(environment):
+        for variable in variables:
+            if environment[variable]['type'] == 'float':
+                return 'float'
+        return 'integer'
+
+    return type
+
+
+def _expression(value, type):
+    return lambda environment: (value(environment), type(environment))
+
+
+def _assignment(variable, value, type):
+    def assignment(environment):
+        result = value(environment)
+        environment[variable] = {'type': type(environment), 'value': result}
+        return (None, None)
+
+    return assignment
+
+
+def _program(statements):
+    return lambda environment: [
+        statement(environment) for statement in statements
+    ]
+
+
+class ClosureFormula:
+    """
+    Turns an AST into nested closures once, with constants, variable
+    names and operator functions already bound, so evaluating the
+    formula is a call to the root closure. It does not need compile()
+    and has the same semantics and environment as CalcVisitor.
+
+    Chains of operations like long sums are evaluated in a loop, but
+    closures still call each other for nested right operands, so
+    expressions like 1 + (1 + (1 + ...)) are limited by the recursion
+    limit and raise RecursionError past it.
+    """
+
+    def __init__(self, node):
+        self.function = self._build(node)
+
+    def __call__(self, environment=None):
+        return self.function(environment if environment is not None else {})
+
+    def _build_expression(self, root):
+        """
+        Returns the closure computing the value of an expression, and
+        a closure computing its type. Operations whose left operand is
+        an operation are collected in a single chain, and a run of signs
+        becomes one negation or none, so calling the closures only nests
+        as deep as the right operands do.
+        """
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if isinstance(node, cpar.NumberNode):
+                results.append((_constant(node.value), [],
+                                node.type == 'float', frozenset()))
+            elif isinstance(node, cpar.VariableNode):
+                results.append((_variable(node.value), [],
+                                False, frozenset([node.value])))
+            elif isinstance(node, cpar.UnaryNode):
+                negative = False
+                while isinstance(node, cpar.UnaryNode):
+                    if node.operator == '-':
+                        negative = not negative
+                    node = node.content
+                if negative:
+                    stack.append((_NEGATION, True))
+                stack.append((node, False))
+            elif node is _NEGATION:
+                first, operations, is_float, variables = results.pop()
+                content = _negation(_chain(first, operations))
+                results.append((content, [], is_float, variables))
+            elif not expanded:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+            else:
+                right, right_operations, right_float, right_variables = \
+                    results.pop()
+                first, operations, left_float, left_variables = results.pop()
+                operations.append((OPERATIONS[node.operator],
+                                   _chain(right, right_operations)))
+                results.append((
+                    first,
+                    operations,
+                    left_float or right_float,
+                    left_variables | right_variables
+                ))
+
+        first, operations, is_float, variables = results.pop()
+        return _chain(first, operations), _type(is_float, variables)
+
+    def _build_statement(self, node):
+        if isinstance(node, cpar.AssignmentNode):
+            value, type = self._build_expression(node.value)
+            return _assignment(node.variable, value, type)
+        return _expression(*self._build_expression(node))
+
+    def _build(self, node):
+        if isinstance(node, cpar.ProgramNode):
+            return _program([
+                self._build_statement(statement)
+                for statement in node.statements
+            ])
+        return self._build_statement(node)
+
+
+def compile_closure(node):
+    return ClosureFormula(node)
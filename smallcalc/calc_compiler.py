@@ -0,0 +1,130 @@
+import math
+
+from . import calc_parser as cpar
+
+PYTHON_OPERATORS = {
+    '+': '+',
+    '-': '-',
+    '*': '*',
+    '/': '//',
+    '^': '**',
+}
+
+
+class CompiledFormula:
+    """
+    Translates an AST into the source of a Python function and compiles
+    it once, so that evaluating the formula is a single call.
+
+    The function follows the semantics of CalcVisitor: it reads and
+    writes variables in an environment in the same format, and returns
+    (value, type) for an expression or a list of them for a program.
+    """
+
+    def __init__(self, node):
+        self.temporaries = 0
+        self.source = self._function_source(node)
+        namespace = {}
+        exec(compile(self.source, '<smallcalc>', 'exec'), namespace)
+        self.function = namespace['formula']
+
+    def __call__(self, environment=None):
+        return self.function(environment if environment is not None else {})
+
+    def _constant(self, value):
+        if isinstance(value, float) and not math.isfinite(value):
+            return "float('{}')".format(value)
+        return '({!r})'.format(value)
+
+    def _type(self, type_info):
+        is_float, variables = type_info
+        if is_float:
+            return "'float'"
+        if not variables:
+            return "'integer'"
+        types = ', '.join(
+            'environment[{!r}][\'type\']'.format(variable)
+            for variable in sorted(variables)
+        )
+        return "('float' if 'float' in ({},) else 'integer')".format(types)
+
+    def _temporary(self, code, source):
+        self.temporaries += 1
+        name = 't{}'.format(self.temporaries)
+        code.append('{} = {}'.format(name, source))
+        return name
+
+    def _expression(self, root, code):
+        """
+        Appends to code the statements that compute an expression, one
+        temporary per operation so that the source never nests, and
+        returns the source of its value and what determines its type:
+        whether it contains a float constant and the variables whose
+        type can promote it to float.
+        """
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if isinstance(node, cpar.NumberNode):
+                results.append((
+                    self._constant(node.value),
+                    (node.type == 'float', frozenset())
+                ))
+            elif isinstance(node, cpar.VariableNode):
+                results.append((
+                    'environment[{!r}][\'value\']'.format(node.value),
+                    (False, frozenset([node.value]))
+                ))
+            elif not expanded:
+                stack.append((node, True))
+                if isinstance(node, cpar.UnaryNode):
+                    stack.append((node.content, False))
+                else:
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+            elif isinstance(node, cpar.UnaryNode):
+                value, type_info = results.pop()
+                if node.operator == '-':
+                    value = self._temporary(code, '-{}'.format(value))
+                results.append((value, type_info))
+            else:
+                right, right_type = results.pop()
+                left, left_type = results.pop()
+                value = self._temporary(code, '{} {} {}'.format(
+                    left, PYTHON_OPERATORS[node.operator], right))
+                results.append((value, (
+                    left_type[0] or right_type[0],
+                    left_type[1] | right_type[1]
+                )))
+        return results.pop()
+
+    def _statement(self, node):
+        code = []
+        if isinstance(node, cpar.AssignmentNode):
+            value, type_info = self._expression(node.value, code)
+            code.append(
+                "environment[{!r}] = {{'type': {}, 'value': {}}}".format(
+                    node.variable, self._type(type_info), value))
+            return code, '(None, None)'
+        value, type_info = self._expression(node, code)
+        return code, '({}, {})'.format(value, self._type(type_info))
+
+    def _function_source(self, node):
+        lines = ['def formula(environment):']
+        if isinstance(node, cpar.ProgramNode):
+            lines.append('    results = []')
+            for statement in node.statements:
+                code, result = self._statement(statement)
+                lines.extend('    ' + line for line in code)
+                lines.append('    results.append({})'.format(result))
+            lines.append('    return results')
+        else:
+            code, result = self._statement(node)
+            lines.extend('    ' + line for line in code)
+            lines.append('    return {}'.format(result))
+        return '\n'.join(lines) + '\n'
+
+
+def compile_node(node):
+    return CompiledFormula(node)
@@ -1,4 +1,5 @@
-import itertools
+import array
+import re
 
 from . import text_buffer
 from . import tok as token
@@ -10,63 +11,168 @@ FLOAT = 'FLOAT'
 LITERAL = 'LITERAL'
 NAME = 'NAME'
 
+# Token types in the order of their codes in a TokenArray
+TOKEN_TYPES = (EOF, EOL, INTEGER, FLOAT, LITERAL, NAME)
+TOKEN_TYPE_CODES = {type: code for code, type in enumerate(TOKEN_TYPES)}
+
+# Shared tokens, so that the parser does not allocate a new token
+# every time it looks for an operator
+LITERAL_TOKENS = {char: token.Token(LITERAL, char) for char in '+-*/^()='}
+
+# Matches the token starting at a given column in one pass; the name of
+# the group that matched tells which kind of token it is.
+_SCANNER = re.compile(r"""
+    (?P<space>\s+)
+    |(?P<number>[\d.]+)
+    |(?P<name>[^\W\d]+)
+    |(?P<literal>.)
+""", re.VERBOSE | re.DOTALL)
+
+
 class TokenError(ValueError):
     pass
 
 class CalcLexer:
-    def __init__(self):
-        self.buffer = text_buffer.TextBuffer()
+    def __init__(self, buffer=None):
+        if buffer is None:
+            buffer = text_buffer.TextBuffer()
+        self.buffer = buffer
         self.positions = []
 
     def load(self, text):
         self.buffer.load(text)
 
-    def _is_identifier(self, char):
-        return char.isalpha() or char == '_'
+    def _scan(self):
+        """
+        Skips the next token, returning its type, the number and the
+        text of its line and the span of its value in the line.
+        """
+        line_number = self.buffer.line
+        try:
+            line = self.buffer.current_line
+        except text_buffer.EOFError:
+            return EOF, line_number, '', 0, 0
 
-    def _is_number(self, char):
-        return char.isdigit() or char == '.'
+        match = _SCANNER.match(line, self.buffer.column)
+        if match is not None and match.lastgroup == 'space':
+            match = _SCANNER.match(line, match.end())
+        if match is None:
+            self.buffer.newline()
+            return EOL, line_number, line, len(line), len(line)
+
+        kind = match.lastgroup
+        start, end = match.span()
+        skip = end
+        if kind == 'number':
+            decimal_point_count = line.count('.', start, end)
+            if decimal_point_count == 0:
+                kind = INTEGER
+            elif decimal_point_count == 1:
+                kind = FLOAT
+            else:
+                # Malformed numbers have always been returned as a
+                # literal and skipped along with the following character
+                kind, end, skip = LITERAL, start + 1, skip + 1
+        elif kind == 'name':
+            kind = NAME
+        else:
+            kind = LITERAL
+
+        self.buffer.goto(line_number, skip)
+        return kind, line_number, line, start, end
 
     def get_token(self):
+        kind, line_number, line, start, end = self._scan()
+        offset = self.buffer.offset_of(line_number, start)
+        if kind in (EOF, EOL):
+            return token.Token(kind, offset=offset)
+        return token.Token(kind, line[start:end], offset=offset)
 
-        try:
-            current_char = self.buffer.current_char
-            while current_char.isspace():
-                self.buffer.skip()
-                current_char = self.buffer.current_char
-            if self._is_number(current_char):
-                number = ''.join(itertools.takewhile(self._is_number, self.buffer.tail))
-                self.buffer.skip(len(number))
-                decimal_point_count = number.count('.')
-                if decimal_point_count == 0:
-                    return token.Token(INTEGER, number)
-                elif decimal_point_count == 1:
-                    return token.Token(FLOAT, number)
-                #raise TokenError('Invalid number {}', number)
-            if self._is_identifier(current_char):
-                name = ''.join(itertools.takewhile(self._is_identifier, self.buffer.tail))
-                self.buffer.skip(len(name))
-                return token.Token(NAME, name)
-            else:
-                self.buffer.skip()
-                return token.Token(LITERAL, current_char)
-        except text_buffer.EOLError:
-            self.buffer.newline()
-            return token.Token(EOL)
-        except text_buffer.EOFError:
-            return token.Token(EOF)
+    def locate(self, token):
+        """
+        Fills in the line and column of a token, computing them
+        from its offset in the text.
+        """
+        if token.offset is not None and token.position is None:
+            token.position = self.buffer.position_of(token.offset)
+        return token
 
-    def get_tokens(self):
-        tokens = []
-        while token.Token(EOF) not in tokens:
-            tokens.append(self.get_token())
+    def get_token_array(self):
+        """
+        Lexes the rest of the text into a TokenArray, without
+        creating any token object.
+        """
+        tokens = TokenArray(self.buffer)
+        kind = None
+        while kind != EOF:
+            kind, line_number, _, start, end = self._scan()
+            tokens.append(kind, line_number, start, end)
         return tokens
 
+    def iter_tokens(self):
+        next_token = self.get_token()
+        while next_token.type != EOF:
+            yield next_token
+            next_token = self.get_token()
+        yield next_token
+
+    def get_tokens(self):
+        return list(self.iter_tokens())
+
+    def _line_tokens(self, line, offset):
+        self.load(line)
+        next_token = self.get_token()
+        # An empty line loads as an empty text, which is just EOF
+        while next_token.type not in (EOL, EOF):
+            next_token.offset += offset
+            yield next_token
+            next_token = self.get_token()
+        yield token.Token(EOL, offset=offset + len(line))
+
+    def stream_tokens(self, chunks):
+        """
+        Lexes text coming from an iterable of chunks, e.g. a file
+        object, yielding tokens as soon as each line is complete.
+        Only the line being read is kept in memory. Lines are lexed
+        in a separate TextBuffer, so the text loaded in this lexer
+        is left untouched.
+        """
+        line_lexer = CalcLexer(text_buffer.TextBuffer())
+        parts = []
+        received = False
+        offset = 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            received = True
+            if '\n' not in chunk:
+                parts.append(chunk)
+                continue
+            lines = chunk.split('\n')
+            parts.append(lines[0])
+            lines[0] = ''.join(parts)
+            parts = [lines.pop()]
+            for line in lines:
+                yield from line_lexer._line_tokens(line, offset)
+                offset += len(line) + 1
+        if received:
+            line = ''.join(parts)
+            yield from line_lexer._line_tokens(line, offset)
+            offset += len(line)
+        yield token.Token(EOF, offset=offset)
+
+    @property
+    def position(self):
+        return self.buffer.position
+
+    def goto(self, position):
+        self.buffer.goto(*position)
+
     def stash(self):
-        self.positions.append(self.buffer.position)
+        self.positions.append(self.position)
 
     def pop(self):
-        self.buffer.goto(*self.positions.pop())
+        self.goto(self.positions.pop())
 
     def peek_token(self):
         self.stash()
@@ -77,12 +183,14 @@ class CalcLexer:
     def discard(self, token):
         next_token = self.get_token()
         if next_token != token:
-            raise TokenError('Expected token {}, found {}'.format(token, next_token))
+            raise TokenError('Expected token {}, found {}'.format(
+                token, self.locate(next_token)))
 
     def discard_type(self, type):
         next_token = self.get_token()
         if next_token.type != type:
-            raise TokenError('Expected token of type {}, found {}'.format(type, next_token))
+            raise TokenError('Expected token of type {}, found {}'.format(
+                type, self.locate(next_token)))
 
     def __enter__(self):
         self.stash()
@@ -91,3 +199,91 @@ class CalcLexer:
         if type == TokenError:
             self.pop()
         return True
+
+
+class TokenArray:
+    """
+    Stores tokens as arrays of type codes and positions in the text.
+    Token objects and their values are created only when an item is
+    read.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.types = array.array('B')
+        self.lines = array.array('l')
+        self.starts = array.array('l')
+        self.ends = array.array('l')
+
+    def append(self, type, line, start, end):
+        self.types.append(TOKEN_TYPE_CODES[type])
+        self.lines.append(line)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self):
+        return len(self.types)
+
+    def type_of(self, index):
+        return TOKEN_TYPES[self.types[index]]
+
+    def value_of(self, index):
+        if self.type_of(index) in (EOF, EOL):
+            return None
+        line = self.buffer.get_line(self.lines[index])
+        return line[self.starts[index]:self.ends[index]]
+
+    def offset_of(self, index):
+        return self.buffer.offset_of(self.lines[index], self.starts[index])
+
+    def __getitem__(self, index):
+        return token.Token(
+            self.type_of(index),
+            self.value_of(index),
+            offset=self.offset_of(index)
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class PrelexedCalcLexer(CalcLexer):
+    """
+    A CalcLexer that tokenizes the whole text when it is loaded.
+    Tokens are stored in an array, so stash, pop and peek just
+    move an index instead of lexing the same text again.
+    """
+
+    def __init__(self, buffer=None):
+        super().__init__(buffer)
+        self.tokens = [token.Token(EOF)]
+        self.index = 0
+
+    def load(self, text):
+        super().load(text)
+        self.tokens = [super().get_token()]
+        while self.tokens[-1].type != EOF:
+            self.tokens.append(super().get_token())
+        self.index = 0
+
+    def get_token(self):
+        token = self.tokens[self.index]
+        if self.index < len(self.tokens) - 1:
+            self.index += 1
+        return token
+
+    def get_tokens(self):
+        tokens = self.tokens[self.index:]
+        self.index = len(self.tokens) - 1
+        return tokens
+
+    @property
+    def position(self):
+        return self.index
+
+    def goto(self, position):
+        self.index = position
+
+    def peek_token(self):
+        return self.tokens[self.index]
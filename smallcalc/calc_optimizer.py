@@ -0,0 +1,145 @@
+from . import calc_parser as cpar
+from .calc_visitor import OPERATIONS
+
+
+def _is_integer(node, value):
+    return isinstance(node, cpar.IntegerNode) and node.value == value
+
+
+def count_nodes(root):
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        for field in node.fields():
+            value = getattr(node, field)
+            if isinstance(value, cpar.Node):
+                stack.append(value)
+            elif isinstance(value, (list, tuple)):
+                stack.extend(value)
+    return count
+
+
+class Optimizer:
+    """
+    Simplifies an AST without changing its results:
+
+    - folds operations on constants
+    - removes +x, --x, x*1, 1*x, x-0 and x^1
+
+    Identities only use integer constants, which never promote the
+    type of x. x+0 and 0+x are kept, because they turn -0.0 into 0.0,
+    and so is x^2, because a float x*x overflows to inf where x^2
+    raises OverflowError.
+
+    The input tree is not modified, unchanged subtrees are reused.
+    """
+
+    def __init__(self):
+        self.eliminated = 0
+
+    def _fold(self, node, left, right):
+        if 'float' in (left.type, right.type):
+            result_type = 'float'
+        else:
+            result_type = 'integer'
+        try:
+            value = OPERATIONS[node.operator](left.value, right.value)
+        except (ArithmeticError, ValueError):
+            # Errors are left to be raised when the formula is evaluated
+            return None
+        if result_type == 'integer' and isinstance(value, int):
+            return cpar.IntegerNode(value)
+        if result_type == 'float' and isinstance(value, float):
+            return cpar.FloatNode(value)
+        # e.g. 2^-1 is a float tagged as integer
+        return None
+
+    def _simplify_unary(self, node, content):
+        if node.operator == '+':
+            return content
+        if isinstance(content, cpar.IntegerNode):
+            return cpar.IntegerNode(-content.value)
+        if isinstance(content, cpar.FloatNode):
+            return cpar.FloatNode(-content.value)
+        if isinstance(content, cpar.UnaryNode) and content.operator == '-':
+            return content.content
+        if content is node.content:
+            return node
+        return cpar.UnaryNode(node.operator, content)
+
+    def _simplify_binary(self, node, left, right):
+        if isinstance(left, cpar.NumberNode) and \
+                isinstance(right, cpar.NumberNode):
+            folded = self._fold(node, left, right)
+            if folded is not None:
+                return folded
+
+        operator = node.operator
+        if operator == '*' and _is_integer(right, 1):
+            return left
+        if operator == '*' and _is_integer(left, 1):
+            return right
+        if operator == '-' and _is_integer(right, 0):
+            return left
+        if operator == '^' and _is_integer(right, 1):
+            return left
+
+        if left is node.left and right is node.right:
+            return node
+        if isinstance(node, cpar.ExponentiationNode):
+            return cpar.ExponentiationNode(left, right, operator)
+        return cpar.BinaryNode(left, right, operator)
+
+    def _optimize_expression(self, root):
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if isinstance(node, cpar.ValueNode):
+                results.append(node)
+            elif not expanded:
+                stack.append((node, True))
+                if isinstance(node, cpar.UnaryNode):
+                    stack.append((node.content, False))
+                else:
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+            elif isinstance(node, cpar.UnaryNode):
+                results.append(self._simplify_unary(node, results.pop()))
+            else:
+                right = results.pop()
+                left = results.pop()
+                results.append(self._simplify_binary(node, left, right))
+        return results.pop()
+
+    def _optimize_statement(self, node):
+        if isinstance(node, cpar.AssignmentNode):
+            return cpar.AssignmentNode(
+                node.variable, self._optimize_expression(node.value))
+        return self._optimize_expression(node)
+
+    def optimize(self, node):
+        """
+        Returns the optimized tree, adding the number of nodes it
+        removed to `eliminated`.
+        """
+        if isinstance(node, cpar.ProgramNode):
+            optimized = cpar.ProgramNode([
+                self._optimize_statement(statement)
+                for statement in node.statements
+            ])
+        else:
+            optimized = self._optimize_statement(node)
+        self.eliminated += count_nodes(node) - count_nodes(optimized)
+        return optimized
+
+
+def optimize(node):
+    """
+    Returns the optimized tree and the number of nodes eliminated.
+    """
+    optimizer = Optimizer()
+    optimized = optimizer.optimize(node)
+    return optimized, optimizer.eliminated
@@ -1,8 +1,31 @@
-from .calc_lexer import TokenError, CalcLexer, INTEGER, FLOAT, LITERAL, NAME
-from .tok import Token
+from .calc_lexer import TokenError, CalcLexer, PrelexedCalcLexer, \
+    EOF, EOL, INTEGER, FLOAT, LITERAL, NAME, LITERAL_TOKENS
+
+ADDSYMBOLS = (LITERAL_TOKENS['+'], LITERAL_TOKENS['-'])
+MULSYMBOLS = (LITERAL_TOKENS['*'], LITERAL_TOKENS['/'])
+
+# Rules whose results are cached by a packrat parser
+MEMOIZED_RULES = (
+    'parse_expression',
+    'parse_term',
+    'parse_factor',
+    '_parse_unary',
+    'parse_assignment',
+)
+
+BINARY_PRECEDENCE = {
+    '+': 1,
+    '-': 1,
+    '*': 2,
+    '/': 2,
+}
+POWER_PRECEDENCE = 3
+UNARY_PRECEDENCE = 4
 
 class CalcParser:
     """
+    program: [ line ] ( EOL [ line ] )*
+    line: assignment | expression
     integer: [0-9]+
     addsymbol: '+' | '-'
     mulsymbol: '*' | '/'
@@ -11,20 +34,57 @@ class CalcParser:
     factor: [ addsymbol ] ( integer | variable | '(' expression ')' )
     """
 
-    def __init__(self):
-        self.lexer = CalcLexer()
+    def __init__(self, lexer=None, packrat=False):
+        self.lexer = lexer if lexer is not None else CalcLexer()
+        self.memo = {}
+        self.memo_text = None
+        if packrat:
+            for rule in MEMOIZED_RULES:
+                setattr(self, rule, self._memoize(rule, getattr(self, rule)))
+
+    def _memoize(self, rule, parse):
+        """
+        Wraps a rule so that its result, or its error, is computed once
+        for each position of the lexer. The memo is cleared when a new
+        text is loaded and at the beginning of each line.
+        """
+        def memoized_rule():
+            if self.lexer.buffer.text is not self.memo_text:
+                self.memo.clear()
+                self.memo_text = self.lexer.buffer.text
+
+            key = (rule, self.lexer.position)
+            if key not in self.memo:
+                try:
+                    result = parse()
+                except TokenError as error:
+                    result = error
+                self.memo[key] = (result, self.lexer.position)
+
+            result, position = self.memo[key]
+            self.lexer.goto(position)
+            if isinstance(result, TokenError):
+                raise result
+            return result
+
+        return memoized_rule
 
     def _expect(self, token, types, values=None):
         if token.type not in types:
-            raise TokenError('Expected token of type {}, found {}'.format(types, token))
+            raise TokenError('Expected token of type {}, found {}'.format(
+                types, self.lexer.locate(token)))
         if values and token.value not in values:
-            raise TokenError('Expected {}, found {}'.format(values, token))
+            raise TokenError('Expected {}, found {}'.format(
+                values, self.lexer.locate(token)))
 
     def parse_number(self):
         token = self.lexer.get_token()
         self._expect(token, [INTEGER, FLOAT])
         if token.type == INTEGER:
             return IntegerNode(token.value)
+        if token.value == '.':
+            raise TokenError('Invalid number {}'.format(
+                self.lexer.locate(token)))
         return FloatNode(token.value)
 
     def _parse_literal(self, *values):
@@ -39,18 +99,18 @@ class CalcParser:
 
     def parse_expression(self):
         left = self.parse_term()
-        while self.lexer.peek_token() in (Token(LITERAL, '+'), Token(LITERAL, '-')):
+        while self.lexer.peek_token() in ADDSYMBOLS:
             operator = self._parse_literal()
             right = self.parse_term()
-            left = BinaryNode(left, right, operator)
+            left = BinaryNode(left, right, operator.value)
         return left
 
     def parse_term(self):
         left = self.parse_factor()
-        while self.lexer.peek_token() in (Token(LITERAL, '*'), Token(LITERAL, '/')):
+        while self.lexer.peek_token() in MULSYMBOLS:
             operator = self._parse_literal()
             right = self.parse_factor()
-            left = BinaryNode(left, right, operator)
+            left = BinaryNode(left, right, operator.value)
         return left
 
     def parse_factor(self):
@@ -58,7 +118,7 @@ class CalcParser:
         with self.lexer:
             operator = self._parse_literal('^')
             right = self._parse_unary()
-            return ExponentiationNode(left, right, operator)
+            return ExponentiationNode(left, right, operator.value)
         return left
 
     def parse_exponentiation(self):
@@ -68,7 +128,7 @@ class CalcParser:
         with self.lexer:
             operator = self._parse_literal('+', '-')
             content = self._parse_unary()
-            return UnaryNode(operator, content)
+            return UnaryNode(operator.value, content)
         with self.lexer:
             self._parse_literal('(')
             expression = self.parse_expression()
@@ -80,75 +140,265 @@ class CalcParser:
 
     def parse_assignment(self):
         variable = self._parse_variable()
-        self.lexer.discard(Token(LITERAL, '='))
+        self.lexer.discard(LITERAL_TOKENS['='])
         value = self.parse_expression()
         return AssignmentNode(variable.value, value)
 
     def parse_line(self):
+        self.memo.clear()
         with self.lexer:
             return self.parse_assignment()
         return self.parse_expression()
 
+    def parse_program(self):
+        statements = []
+        next_token = self.lexer.peek_token()
+        while next_token.type != EOF:
+            if next_token.type != EOL:
+                statements.append(self.parse_line())
+            self.lexer.discard_type(EOL)
+            next_token = self.lexer.peek_token()
+        return ProgramNode(statements)
+
+
+class PrattParser(CalcParser):
+    """
+    A parser for the same grammar as CalcParser that never backtracks.
+    It chooses each step looking at the next token only, and parses
+    operators by precedence on explicit stacks, so parsing time is
+    linear in the number of tokens and nesting does not recurse.
+    """
+
+    def __init__(self, lexer=None):
+        super().__init__(lexer if lexer is not None else PrelexedCalcLexer())
+
+    def _reduce(self, operands, operators, precedence):
+        while operators and operators[-1][0] == 'binary' and \
+                BINARY_PRECEDENCE[operators[-1][1]] >= precedence:
+            right = operands.pop()
+            left = operands.pop()
+            operands.append(BinaryNode(left, right, operators.pop()[1]))
+
+    def _parse_operation(self, precedence):
+        """
+        Parses operations until it finds an operator that binds less
+        than `precedence`. Pending operands and operators are kept on
+        explicit stacks, so nesting depth is limited only by memory.
+        """
+        operands = []
+        operators = []
+        depth = 0
+        power_used = False
+
+        while True:
+            next_token = self.lexer.peek_token()
+            if next_token in ADDSYMBOLS:
+                operators.append(('unary', self._parse_literal().value))
+                continue
+            if next_token == LITERAL_TOKENS['(']:
+                self._parse_literal()
+                operators.append(('group', power_used))
+                depth += 1
+                power_used = False
+                continue
+            if next_token.type == NAME:
+                operands.append(self._parse_variable())
+            else:
+                operands.append(self.parse_number())
+
+            # Close all the operations completed by this operand
+            while True:
+                while operators and operators[-1][0] == 'unary':
+                    operands.append(
+                        UnaryNode(operators.pop()[1], operands.pop()))
+                if operators and operators[-1][0] == 'power':
+                    right = operands.pop()
+                    left = operands.pop()
+                    operands.append(
+                        ExponentiationNode(left, right, operators.pop()[1]))
+                if depth == 0 or \
+                        self.lexer.peek_token() != LITERAL_TOKENS[')']:
+                    break
+                self._parse_literal()
+                self._reduce(operands, operators, 0)
+                power_used = operators.pop()[1]
+                depth -= 1
+
+            if depth == 0 and precedence > POWER_PRECEDENCE:
+                return operands.pop()
+
+            next_token = self.lexer.peek_token()
+            if next_token == LITERAL_TOKENS['^'] and not power_used:
+                operators.append(('power', self._parse_literal().value))
+                power_used = True
+                continue
+
+            operator_precedence = None
+            if next_token.type == LITERAL:
+                operator_precedence = BINARY_PRECEDENCE.get(next_token.value)
+            if operator_precedence is not None and \
+                    (depth > 0 or operator_precedence >= precedence):
+                self._reduce(operands, operators, operator_precedence)
+                operators.append(('binary', self._parse_literal().value))
+                power_used = False
+                continue
+
+            if depth > 0:
+                self._parse_literal(')')
+            self._reduce(operands, operators, 0)
+            return operands.pop()
+
+    def parse_expression(self):
+        return self._parse_operation(BINARY_PRECEDENCE['+'])
+
+    def parse_term(self):
+        return self._parse_operation(BINARY_PRECEDENCE['*'])
+
+    def parse_factor(self):
+        return self._parse_operation(POWER_PRECEDENCE)
+
+    def _parse_unary(self):
+        return self._parse_operation(UNARY_PRECEDENCE)
+
+    def parse_line(self):
+        # An assignment starts like an expression made of a variable
+        first_token = self.lexer.peek_token()
+        expression = self.parse_expression()
+        if first_token.type == NAME and isinstance(expression, VariableNode) \
+                and self.lexer.peek_token() == LITERAL_TOKENS['=']:
+            self._parse_literal()
+            value = self.parse_expression()
+            return AssignmentNode(expression.value, value)
+        return expression
+
+
+# Slot names of each Node class, including the inherited ones
+_node_fields = {}
+
 class Node:
+    """
+    Nodes store their fields in slots, and operators as their symbol,
+    which is the same string object for every node. asdict() gives
+    the nested dictionary form of the tree, with operators as literals.
+    """
+
+    __slots__ = ('type',)
+
     def __init__(self, type):
         self.type = type
 
+    @classmethod
+    def fields(cls):
+        try:
+            return _node_fields[cls]
+        except KeyError:
+            pass
+        fields = tuple(
+            field
+            for klass in reversed(cls.__mro__)
+            for field in getattr(klass, '__slots__', ())
+        )
+        _node_fields[cls] = fields
+        return fields
+
     def asdict(self):
-        dict = vars(self)
-        for (key, value) in dict.items():
-            if isinstance(value, Node):
-                dict[key] = value.asdict()
-        return dict
+        result = {}
+        stack = [(self, result)]
+        while stack:
+            node, target = stack.pop()
+            for key in node.fields():
+                value = getattr(node, key)
+                if isinstance(value, Node):
+                    target[key] = {}
+                    stack.append((value, target[key]))
+                elif isinstance(value, (list, tuple)):
+                    target[key] = [{} for _ in value]
+                    stack.extend(zip(value, target[key]))
+                elif key == 'operator':
+                    target[key] = {'type': 'literal', 'value': value}
+                else:
+                    target[key] = value
+        return result
 
 class ValueNode(Node):
+    __slots__ = ('value',)
+
     def __init__(self, type, value):
         super().__init__(type)
         self.value = value
 
 class NumberNode(ValueNode):
+    __slots__ = ()
+
     def __init__(self, type, value):
         super().__init__(type, value)
 
 class IntegerNode(NumberNode):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__('integer', int(value))
 
 class FloatNode(NumberNode):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__('float', float(value))
 
 class LiteralNode(ValueNode):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__('literal', value)
 
 class VariableNode(ValueNode):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__('variable', value)
 
 class OperationNode(Node):
+    __slots__ = ('operator',)
+
     def __init__(self, type, operator):
         super().__init__(type)
         self.operator = operator
 
 class UnaryNode(OperationNode):
+    __slots__ = ('content',)
+
     def __init__(self, operator, content):
         super().__init__('unary', operator)
         self.content = content
 
 class BinaryNode(OperationNode):
+    __slots__ = ('left', 'right')
+
     def __init__(self, left, right, operator):
         super().__init__('binary', operator)
         self.left = left
         self.right = right
 
 class ExponentiationNode(OperationNode):
+    __slots__ = ('left', 'right')
+
     def __init__(self, left, right, operator):
         super().__init__('exponentiation', operator)
         self.left = left
         self.right = right
 
 class AssignmentNode(Node):
+    __slots__ = ('variable', 'value')
+
     def __init__(self, variable, value):
         super().__init__('assignment')
         self.variable = variable
         self.value = value
+
+
+class ProgramNode(Node):
+    __slots__ = ('statements',)
+
+    def __init__(self, statements):
+        super().__init__('program')
+        self.statements = statements
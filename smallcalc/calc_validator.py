@@ -0,0 +1,102 @@
+import collections
+
+from .calc_lexer import CalcLexer, EOL, INTEGER, FLOAT, LITERAL, NAME
+
+ValidationError = collections.namedtuple(
+    'ValidationError', ['line', 'column', 'message'])
+
+OPERATORS = ('+', '-', '*', '/')
+
+
+class CalcValidator:
+    """
+    Checks that every line of a text is a valid statement, without
+    building any AST. Tokens are checked by a small state machine that
+    accepts the same lines as parse_program. After an error the rest
+    of the line is skipped, so a single pass reports the first error
+    of every line.
+    """
+
+    def __init__(self, lexer=None):
+        self.lexer = lexer if lexer is not None else CalcLexer()
+
+    def _error(self, token, message):
+        line, column = self.lexer.locate(token).position
+        return ValidationError(line, column, message.format(token))
+
+    def validate(self, text):
+        self.lexer.load(text)
+        errors = []
+
+        expect_operand = True
+        empty_line = True
+        assignable = False
+        power_used = False
+        groups = []
+        skipping = False
+
+        for token in self.lexer.iter_tokens():
+            error = None
+
+            if token.type == EOL:
+                if skipping:
+                    pass
+                elif groups:
+                    error = "Expected ')', found {}"
+                elif expect_operand and not empty_line:
+                    error = 'Expected a number, a variable or (, found {}'
+                if error is not None:
+                    errors.append(self._error(token, error))
+                expect_operand = True
+                empty_line = True
+                assignable = False
+                power_used = False
+                groups = []
+                skipping = False
+                continue
+
+            if skipping or token.type not in (INTEGER, FLOAT, LITERAL, NAME):
+                continue
+
+            first_token = empty_line
+            empty_line = False
+
+            if expect_operand:
+                if token.type == LITERAL and token.value in ('+', '-'):
+                    continue
+                if token.type == LITERAL and token.value == '(':
+                    groups.append(power_used)
+                    power_used = False
+                    continue
+                if token.type == FLOAT and token.value == '.':
+                    error = 'Invalid number {}'
+                elif token.type in (INTEGER, FLOAT, NAME):
+                    expect_operand = False
+                    assignable = first_token and token.type == NAME
+                    continue
+                else:
+                    error = 'Expected a number, a variable or (, found {}'
+            elif token.type == LITERAL:
+                if token.value == ')' and groups:
+                    power_used = groups.pop()
+                    assignable = False
+                    continue
+                if token.value == '^' and not power_used:
+                    power_used = True
+                    expect_operand = True
+                    assignable = False
+                    continue
+                if token.value in OPERATORS or \
+                        (token.value == '=' and assignable):
+                    power_used = False
+                    expect_operand = True
+                    assignable = False
+                    continue
+                error = 'Unexpected {}'
+            else:
+                error = 'Unexpected {}'
+
+            errors.append(self._error(token, error))
+            skipping = True
+
+        return errors
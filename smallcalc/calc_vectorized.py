@@ -0,0 +1,120 @@
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from . import calc_parser as cpar
+
+
+def _floor_divide(left, right, out=None):
+    # Python raises on division by zero, where NumPy warns
+    if numpy.any(right == 0):
+        raise ZeroDivisionError('division by zero')
+    return numpy.floor_divide(left, right, out=out)
+
+
+def _is_integer(value):
+    return numpy.asarray(value).dtype.kind in 'iu'
+
+
+def _power(left, right, out=None):
+    if numpy.any((left == 0) & (right < 0)):
+        raise ZeroDivisionError('0 cannot be raised to a negative power')
+    # Python turns integer powers with negative exponents into floats,
+    # while NumPy refuses to compute them
+    dtype = None
+    if out is not None:
+        dtype = out.dtype
+    elif _is_integer(left) and _is_integer(right) and numpy.any(right < 0):
+        dtype = float
+    return numpy.power(left, right, out=out, dtype=dtype)
+
+
+OPERATIONS = {
+    '+': numpy.add if numpy else None,
+    '-': numpy.subtract if numpy else None,
+    '*': numpy.multiply if numpy else None,
+    '/': _floor_divide,
+    '^': _power,
+}
+
+
+class VectorizedVisitor:
+    """
+    Evaluates an AST over arrays of values, one row per set of
+    variable bindings. Each node is evaluated once, as a NumPy
+    operation on whole arrays.
+
+    Types follow CalcVisitor: a result is 'float' if any number or
+    variable it depends on is, otherwise 'integer'. Integer arrays use
+    fixed size NumPy integers, so unlike Python they can overflow.
+    """
+
+    def __init__(self):
+        if numpy is None:
+            raise RuntimeError('Vectorized evaluation requires NumPy')
+        self.environment = {}
+
+    def bind(self, variable, values):
+        values = numpy.asarray(values)
+        type = 'float' if values.dtype.kind == 'f' else 'integer'
+        self.environment[variable] = {'type': type, 'value': values}
+
+    def _promote_number(self, left_type, right_type):
+        return 'float' if 'float' in (left_type, right_type) else 'integer'
+
+    def _visit_expression(self, root):
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if isinstance(node, cpar.NumberNode):
+                results.append((node.value, node.type))
+            elif isinstance(node, cpar.VariableNode):
+                variable = self.environment[node.value]
+                results.append((variable['value'], variable['type']))
+            elif not expanded:
+                stack.append((node, True))
+                if isinstance(node, cpar.UnaryNode):
+                    stack.append((node.content, False))
+                else:
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+            elif isinstance(node, cpar.UnaryNode):
+                content, type = results.pop()
+                if node.operator == '-':
+                    content = numpy.negative(content)
+                results.append((content, type))
+            else:
+                right, right_type = results.pop()
+                left, left_type = results.pop()
+                results.append((
+                    OPERATIONS[node.operator](left, right),
+                    self._promote_number(left_type, right_type)
+                ))
+        return results.pop()
+
+    def _visit_statement(self, node):
+        if isinstance(node, cpar.AssignmentNode):
+            value, type = self._visit_expression(node.value)
+            self.environment[node.variable] = {'type': type, 'value': value}
+            return (None, None)
+        return self._visit_expression(node)
+
+    def visit(self, node):
+        if isinstance(node, cpar.ProgramNode):
+            return [
+                self._visit_statement(statement)
+                for statement in node.statements
+            ]
+        return self._visit_statement(node)
+
+
+def evaluate(node, **bindings):
+    """
+    Evaluates an expression with each variable bound to an array.
+    """
+    visitor = VectorizedVisitor()
+    for variable, values in bindings.items():
+        visitor.bind(variable, values)
+    return visitor.visit(node)
@@ -1,40 +1,96 @@
+import operator
+
+OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.floordiv,
+    '^': operator.pow,
+}
+
+_node_operator = operator.attrgetter('operator')
+
+
+def _dict_operator(node):
+    return node['operator']['value']
+
+
 class CalcVisitor:
     def __init__(self):
         self.environment = {}
 
     def visit(self, ast):
-        if ast['type'] in ('integer', 'float'):
-            return (ast['value'], ast['type'])
-        if ast['type'] == 'unary':
-            operator = ast['operator']['value']
-            content, type = self.visit(ast['content'])
-            if operator == '+':
-                return (content, type)
-            if operator == '-':
-                return (-content, type)
-        if ast['type'] in ('binary', 'exponentiation'):
-            left, left_type = self.visit(ast['left'])
-            right, right_type = self.visit(ast['right'])
-            result_type = self._promote_number(left_type, right_type)
-            operator = ast['operator']['value']
-            if operator == '+':
-                return (left + right, result_type)
-            if operator == '-':
-                return (left - right, result_type)
-            if operator == '*':
-                return (left * right, result_type)
-            if operator == '/':
-                return (left // right, result_type)
-            if operator == '^':
-                return (left ** right, result_type)
-        if ast['type'] == 'assignment':
-            variable = ast['variable']
-            value = ast['value']
-            self.environment[variable] = value
-        if ast['type'] == 'variable':
-            variable = ast['value']
-            return (self.valueof(variable), self.typeof(variable))
-        return (None, None)
+        """
+        Evaluates a Node tree, or its asdict() form, without recursion,
+        so that the depth of the tree is not limited. Values and types
+        are kept on two parallel stacks. An operation is deferred by
+        pushing it on its own stack and a None placeholder after its
+        children, which are popped when the placeholder is reached.
+        """
+        if isinstance(ast, dict):
+            return self._visit(ast, operator.getitem, _dict_operator)
+        return self._visit(ast, getattr, _node_operator)
+
+    def _visit(self, root, field, operator_of):
+        """
+        Evaluates either form of the tree: field(node, name) reads a
+        field of a node, operator_of(node) the symbol of its operator.
+        """
+        environment = self.environment
+        values = []
+        types = []
+        operations = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                node = operations.pop()
+                node_type = field(node, 'type')
+                if node_type == 'binary' or node_type == 'exponentiation':
+                    right = values.pop()
+                    if types.pop() == 'float':
+                        types[-1] = 'float'
+                    values[-1] = OPERATIONS[operator_of(node)](
+                        values[-1], right)
+                elif node_type == 'unary':
+                    values[-1] = -values[-1]
+                elif node_type == 'assignment':
+                    self._assign(field(node, 'variable'), values, types)
+                else:
+                    return list(zip(values, types))
+                continue
+
+            node_type = field(node, 'type')
+            if node_type == 'integer' or node_type == 'float':
+                values.append(field(node, 'value'))
+                types.append(node_type)
+            elif node_type == 'variable':
+                variable = environment[field(node, 'value')]
+                values.append(variable['value'])
+                types.append(variable['type'])
+            elif node_type == 'binary' or node_type == 'exponentiation':
+                operations.append(node)
+                stack.append(None)
+                stack.append(field(node, 'right'))
+                stack.append(field(node, 'left'))
+            elif node_type == 'unary':
+                if operator_of(node) == '-':
+                    operations.append(node)
+                    stack.append(None)
+                stack.append(field(node, 'content'))
+            elif node_type in ('assignment', 'program'):
+                operations.append(node)
+                stack.append(None)
+                if node_type == 'assignment':
+                    stack.append(field(node, 'value'))
+                else:
+                    stack.extend(reversed(field(node, 'statements')))
+        return (values[-1], types[-1])
+
+    def _assign(self, variable, values, types):
+        self.environment[variable] = {'type': types[-1], 'value': values[-1]}
+        values[-1] = None
+        types[-1] = None
 
     def _promote_number(self, left_type, right_type):
         return 'float' if 'float' in (left_type, right_type) else 'integer'
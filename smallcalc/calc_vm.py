@@ -0,0 +1,149 @@
+import array
+
+from . import calc_parser as cpar
+from .calc_visitor import OPERATIONS
+
+# Opcodes; each instruction is an opcode followed by one argument,
+# which is ignored by the operations that do not need it
+PUSH_CONSTANT = 0
+LOAD_VARIABLE = 1
+STORE = 2
+RESULT = 3
+NEG = 4
+ADD = 5
+SUB = 6
+MUL = 7
+FLOORDIV = 8
+POW = 9
+
+BINARY_OPCODES = {
+    '+': ADD,
+    '-': SUB,
+    '*': MUL,
+    '/': FLOORDIV,
+    '^': POW,
+}
+
+BINARY_FUNCTIONS = {
+    opcode: OPERATIONS[operator]
+    for operator, opcode in BINARY_OPCODES.items()
+}
+
+
+class Program:
+    """
+    A compiled AST: a flat array of instructions for a stack machine,
+    with the constants and the variable names it refers to. Programs
+    can be pickled, e.g. to send them to worker processes.
+    """
+
+    def __init__(self, node=None):
+        self.code = array.array('l')
+        self.constants = []
+        self.names = []
+        self.is_program = isinstance(node, cpar.ProgramNode)
+        if node is not None:
+            self._compile(node)
+
+    def __call__(self, environment=None):
+        return run(self, environment)
+
+    def _emit(self, opcode, argument=0):
+        self.code.append(opcode)
+        self.code.append(argument)
+
+    def _constant(self, value, is_float):
+        self.constants.append((value, is_float))
+        return len(self.constants) - 1
+
+    def _name(self, name):
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name)
+
+    def _compile_expression(self, root):
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if isinstance(node, cpar.NumberNode):
+                self._emit(PUSH_CONSTANT,
+                           self._constant(node.value, node.type == 'float'))
+            elif isinstance(node, cpar.VariableNode):
+                self._emit(LOAD_VARIABLE, self._name(node.value))
+            elif not expanded:
+                stack.append((node, True))
+                if isinstance(node, cpar.UnaryNode):
+                    stack.append((node.content, False))
+                else:
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+            elif isinstance(node, cpar.UnaryNode):
+                if node.operator == '-':
+                    self._emit(NEG)
+            else:
+                self._emit(BINARY_OPCODES[node.operator])
+
+    def _compile_statement(self, node):
+        if isinstance(node, cpar.AssignmentNode):
+            self._compile_expression(node.value)
+            self._emit(STORE, self._name(node.variable))
+        else:
+            self._compile_expression(node)
+            self._emit(RESULT)
+
+    def _compile(self, node):
+        statements = node.statements if self.is_program else [node]
+        for statement in statements:
+            self._compile_statement(statement)
+
+
+def run(program, environment=None):
+    """
+    Runs a Program, returning the same results as CalcVisitor.
+    The stack keeps values and, in parallel, whether they are floats.
+    """
+    if environment is None:
+        environment = {}
+    code = program.code
+    constants = program.constants
+    names = program.names
+
+    values = []
+    floats = []
+    results = []
+    pc = 0
+    end = len(code)
+    while pc < end:
+        opcode = code[pc]
+        argument = code[pc + 1]
+        pc += 2
+        if opcode >= ADD:
+            right = values.pop()
+            right_float = floats.pop()
+            values[-1] = BINARY_FUNCTIONS[opcode](values[-1], right)
+            floats[-1] = floats[-1] or right_float
+        elif opcode == PUSH_CONSTANT:
+            value, is_float = constants[argument]
+            values.append(value)
+            floats.append(is_float)
+        elif opcode == LOAD_VARIABLE:
+            variable = environment[names[argument]]
+            values.append(variable['value'])
+            floats.append(variable['type'] == 'float')
+        elif opcode == NEG:
+            values[-1] = -values[-1]
+        elif opcode == RESULT:
+            type = 'float' if floats.pop() else 'integer'
+            results.append((values.pop(), type))
+        elif opcode == STORE:
+            type = 'float' if floats.pop() else 'integer'
+            environment[names[argument]] = {
+                'type': type, 'value': values.pop()
+            }
+            results.append((None, None))
+
+    return results if program.is_program else results[0]
+
+
+def compile_bytecode(node):
+    return Program(node)
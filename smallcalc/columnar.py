@@ -0,0 +1,127 @@
+import itertools
+
+from .calc_blocked import BlockedEvaluator, BLOCK_SIZE
+from .calc_parser import PrattParser
+from .calc_vectorized import numpy
+
+# Rows read from the input at a time
+CHUNK_ROWS = 65536
+
+
+def parse_formula(formula):
+    parser = PrattParser()
+    parser.lexer.load(formula)
+    statements = parser.parse_program().statements
+    if len(statements) != 1:
+        raise ValueError('Expected a single formula, found {}'.format(
+            len(statements)))
+    return statements[0]
+
+
+def parse_columns(spec):
+    """
+    Parses the layout of a raw binary record, given as
+    'name:dtype,name:dtype', e.g. 'x:int64,y:float64'.
+    """
+    fields = []
+    for field in spec.split(','):
+        name, _, dtype = field.strip().partition(':')
+        fields.append((name, dtype or 'float64'))
+    return numpy.dtype(fields)
+
+
+def read_csv(f, columns=None, chunk_rows=CHUNK_ROWS):
+    """
+    Reads a CSV file with a header, yielding structured arrays of at
+    most chunk_rows rows. Columns are read as floats, unless their type
+    is given in columns, in the format of parse_columns.
+    """
+    names = [name.strip() for name in f.readline().split(',')]
+    types = {}
+    if columns:
+        declared = parse_columns(columns)
+        for name in declared.names:
+            if name not in names:
+                raise ValueError('Unknown column {}'.format(name))
+            types[name] = declared[name]
+    dtype = numpy.dtype([(name, types.get(name, 'float64')) for name in names])
+    while True:
+        lines = list(itertools.islice(f, chunk_rows))
+        if not lines:
+            return
+        yield numpy.loadtxt(lines, dtype=dtype, delimiter=',', ndmin=1)
+
+
+def read_binary(f, dtype, chunk_rows=CHUNK_ROWS):
+    """
+    Reads a file of fixed size records, yielding structured arrays of
+    at most chunk_rows rows. All chunks share the same buffer, so each
+    one is only valid until the next one is read.
+    """
+    buffer = bytearray(chunk_rows * dtype.itemsize)
+    while True:
+        size = f.readinto(buffer)
+        if not size:
+            return
+        if size % dtype.itemsize:
+            raise ValueError('Truncated record at the end of the file')
+        yield numpy.frombuffer(buffer, dtype, size // dtype.itemsize)
+
+
+def write_csv(f, values):
+    if len(values):
+        f.write('\n'.join(map(str, values.tolist())))
+        f.write('\n')
+
+
+def write_binary(f, values):
+    f.write(values.tobytes())
+
+
+def evaluate_chunks(evaluator, chunks, bindings=None):
+    """
+    Runs a BlockedEvaluator on each chunk of rows, binding variables
+    to the columns with the same name, or to the ones given in the
+    bindings {variable: column}. Yields the blocks of results, which
+    are only valid until the next one is generated.
+    """
+    bindings = bindings or {}
+    for chunk in chunks:
+        columns = {name: chunk[name] for name in chunk.dtype.names}
+        for variable, column in bindings.items():
+            columns[variable] = chunk[column]
+        type, blocks = evaluator.iter_blocks(**columns)
+        for block in blocks:
+            yield block
+
+
+def evaluate_csv(formula, input_path, output_path, columns=None,
+                 bindings=None, chunk_rows=CHUNK_ROWS, block_size=BLOCK_SIZE):
+    """
+    Evaluates the formula on each row of a CSV file, writing one
+    result per line. Columns are floats unless their types are given
+    in columns (see read_csv). Returns the evaluation info.
+    """
+    evaluator = BlockedEvaluator(parse_formula(formula), block_size)
+    with open(input_path) as source, open(output_path, 'w') as target:
+        chunks = read_csv(source, columns, chunk_rows)
+        for block in evaluate_chunks(evaluator, chunks, bindings):
+            write_csv(target, block)
+    return evaluator.info()
+
+
+def evaluate_binary(formula, input_path, output_path, columns,
+                    bindings=None, chunk_rows=CHUNK_ROWS,
+                    block_size=BLOCK_SIZE):
+    """
+    Evaluates the formula on each record of a raw binary file laid
+    out as described by columns (see parse_columns), writing the
+    results as raw values. Returns the evaluation info.
+    """
+    evaluator = BlockedEvaluator(parse_formula(formula), block_size)
+    dtype = parse_columns(columns)
+    with open(input_path, 'rb') as source, open(output_path, 'wb') as target:
+        chunks = read_binary(source, dtype, chunk_rows)
+        for block in evaluate_chunks(evaluator, chunks, bindings):
+            write_binary(target, block)
+    return evaluator.info()
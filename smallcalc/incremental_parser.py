@@ -0,0 +1,113 @@
+import bisect
+
+from .calc_lexer import TokenError, EOL
+from .calc_parser import PrattParser
+
+
+class IncrementalParser:
+    """
+    Keeps the tokens and the AST of each line of a text. An edit
+    lexes and parses again only the lines it touches, the tokens
+    and nodes of all the other lines are reused as they are.
+
+    Token offsets are relative to the beginning of their line. The
+    offsets of the lines are computed lazily from their lengths: an
+    edit only invalidates the ones after it, which are computed again
+    when an offset past the edit is needed.
+    """
+
+    def __init__(self, text=''):
+        self.parser = PrattParser()
+        self.load(text)
+
+    def load(self, text):
+        self.lines = []
+        self.line_lengths = []
+        self._line_starts = []
+        # Number of entries at the beginning of _line_starts that are valid
+        self._valid_starts = 0
+        self.tokens = []
+        self.nodes = []
+        self.errors = []
+        self._replace_lines(0, 0, text.split('\n'))
+
+    @property
+    def text(self):
+        return '\n'.join(self.lines)
+
+    def _parse(self, line):
+        lexer = self.parser.lexer
+        lexer.load(line)
+        # Drop the trailing EOL and EOF
+        tokens = lexer.tokens[:-2]
+        if not tokens:
+            return tokens, None, None
+
+        try:
+            node = self.parser.parse_line()
+            lexer.discard_type(EOL)
+        except TokenError as error:
+            return tokens, None, error
+        return tokens, node, None
+
+    def _replace_lines(self, first, last, lines):
+        parsed = [self._parse(line) for line in lines]
+        self.lines[first:last] = lines
+        self.line_lengths[first:last] = [len(line) + 1 for line in lines]
+        self._line_starts[first:last] = [0] * len(lines)
+        self._valid_starts = min(self._valid_starts, first)
+        self.tokens[first:last] = [tokens for tokens, _, _ in parsed]
+        self.nodes[first:last] = [node for _, node, _ in parsed]
+        self.errors[first:last] = [error for _, _, error in parsed]
+
+    def _compute_starts(self, line=None, offset=None):
+        """
+        Computes the offsets of the lines up to `line`, or up to the
+        first line that starts after `offset`.
+        """
+        starts = self._line_starts
+        lengths = self.line_lengths
+        index = self._valid_starts
+        start = starts[index - 1] + lengths[index - 1] if index else 0
+        while index < len(starts):
+            if line is not None and index > line:
+                break
+            if offset is not None and start > offset:
+                break
+            starts[index] = start
+            start += lengths[index]
+            index += 1
+        self._valid_starts = index
+
+    def line_start(self, line):
+        if line >= self._valid_starts:
+            self._compute_starts(line=line)
+        return self._line_starts[line]
+
+    @property
+    def line_starts(self):
+        self._compute_starts(line=len(self.lines))
+        return list(self._line_starts)
+
+    def _line_of(self, offset):
+        valid = self._valid_starts
+        if not valid or self._line_starts[valid - 1] <= offset:
+            self._compute_starts(offset=offset)
+        line = bisect.bisect_right(
+            self._line_starts, offset, 0, self._valid_starts) - 1
+        return max(line, 0)
+
+    def edit(self, offset, deleted, inserted):
+        """
+        Replaces `deleted` characters at `offset` with the text
+        `inserted`, returning the range of the lines that changed.
+        """
+        first = self._line_of(offset)
+        last = self._line_of(offset + deleted)
+
+        head = self.lines[first][:offset - self.line_start(first)]
+        tail = self.lines[last][offset + deleted - self.line_start(last):]
+        lines = (head + inserted + tail).split('\n')
+
+        self._replace_lines(first, last + 1, lines)
+        return range(first, first + len(lines))
@@ -0,0 +1,149 @@
+import hashlib
+
+from .calc_parser import Node
+
+# Frozen version of each Node class, created on first use
+_frozen_classes = {}
+
+
+class FrozenNode:
+    """
+    Base of the immutable versions of the Node classes. Their fields
+    are set once when they are created, lists are stored as tuples,
+    and the structural hash of the subtree is kept in its own slot.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def fields(cls):
+        return cls.node_class.fields()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Frozen nodes cannot be modified')
+
+    def __delattr__(self, name):
+        raise AttributeError('Frozen nodes cannot be modified')
+
+
+def frozen_class(cls):
+    """
+    Returns the frozen version of a Node class, which is a subclass
+    of it, so isinstance() checks keep working.
+    """
+    cls = getattr(cls, 'node_class', cls)
+    try:
+        return _frozen_classes[cls]
+    except KeyError:
+        pass
+    frozen = type('Frozen' + cls.__name__, (FrozenNode, cls), {
+        '__slots__': ('structural_hash',),
+        'node_class': cls,
+    })
+    _frozen_classes[cls] = frozen
+    return frozen
+
+
+def freeze(cls, values, structural_hash):
+    """
+    Creates a frozen node of class cls with the given field values.
+    """
+    frozen = frozen_class(cls)
+    node = frozen.__new__(frozen)
+    for field, value in zip(frozen.fields(), values):
+        if isinstance(value, list):
+            value = tuple(value)
+        object.__setattr__(node, field, value)
+    object.__setattr__(node, 'structural_hash', structural_hash)
+    return node
+
+
+class NodeInterner:
+    """
+    Turns ASTs into DAGs where structurally equal subtrees are a
+    single shared node, so memory grows with the number of distinct
+    subexpressions.
+
+    Shared nodes are frozen, so they cannot be modified by mistake,
+    and each one has a structural_hash that does not depend on the
+    process, usable as a key to cache per-subtree results or code.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def hash(self, node):
+        return node.structural_hash
+
+    def _children(self, node):
+        children = []
+        for field in node.fields():
+            value = getattr(node, field)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, (list, tuple)):
+                children.extend(value)
+        return children
+
+    def _key(self, value):
+        if isinstance(value, Node):
+            return id(value)
+        if isinstance(value, (list, tuple)):
+            return tuple(id(item) for item in value)
+        # repr() keeps apart values that compare equal, like 0.0 and -0.0
+        return repr(value)
+
+    def _structural_hash(self, cls, values):
+        parts = [cls.__name__]
+        for value in values:
+            if isinstance(value, Node):
+                parts.append(value.structural_hash)
+            elif isinstance(value, (list, tuple)):
+                parts.append([item.structural_hash for item in value])
+            else:
+                parts.append(repr(value))
+        digest = hashlib.sha1(repr(parts).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def _intern_node(self, node, interned):
+        cls = getattr(type(node), 'node_class', type(node))
+        fields = cls.fields()
+        values = []
+        for field in fields:
+            value = getattr(node, field)
+            if isinstance(value, Node):
+                value = interned[id(value)]
+            elif isinstance(value, (list, tuple)):
+                value = [interned[id(item)] for item in value]
+            values.append(value)
+
+        key = (cls,) + tuple(self._key(value) for value in values)
+        shared = self.nodes.get(key)
+        if shared is not None:
+            return shared
+
+        shared = freeze(cls, values, self._structural_hash(cls, values))
+        self.nodes[key] = shared
+        return shared
+
+    def intern(self, root):
+        """
+        Returns the shared version of the tree, built bottom-up on an
+        explicit stack.
+        """
+        interned = {}
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in interned:
+                continue
+            children = self._children(node)
+            if children and not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children)
+                continue
+            interned[id(node)] = self._intern_node(node, interned)
+        return interned[id(root)]
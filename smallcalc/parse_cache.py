@@ -0,0 +1,52 @@
+import collections
+
+from .calc_lexer import EOL
+from .calc_parser import PrattParser
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class ParseCache:
+    """
+    Parses lines of text, keeping the ASTs of the `maxsize` most
+    recently used ones. The same text returns the same node, so the
+    nodes are shared and must not be changed by their users.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.parser = PrattParser()
+        self.nodes = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _parse(self, text):
+        self.parser.lexer.load(text)
+        node = self.parser.parse_line()
+        self.parser.lexer.discard_type(EOL)
+        return node
+
+    def parse(self, text):
+        try:
+            node = self.nodes[text]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.nodes.move_to_end(text)
+            return node
+
+        node = self._parse(text)
+        self.nodes[text] = node
+        if len(self.nodes) > self.maxsize:
+            self.nodes.popitem(last=False)
+        return node
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.nodes))
+
+    def clear(self):
+        self.nodes.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,3 +1,9 @@
+import array
+import bisect
+import mmap
+import re
+
+
 class EOLError(ValueError):
 
     """ Signals that the buffer is reading after the end of a line."""
@@ -20,17 +26,36 @@ class TextBuffer:
     def load(self, text):
         self.text = text
         self.lines = text.split('\n') if text else []
+        self.line_starts = []
+        start = 0
+        for line in self.lines:
+            self.line_starts.append(start)
+            start += len(line) + 1
         self.reset()
 
-    @property
-    def current_line(self):
+    def offset_of(self, line, column=0):
+        if line < len(self.line_starts):
+            return self.line_starts[line] + column
+        return len(self.text) if self.text else 0
+
+    def position_of(self, offset):
+        line = max(bisect.bisect_right(self.line_starts, offset) - 1, 0)
+        if not self.line_starts:
+            return (line, offset)
+        return (line, offset - self.line_starts[line])
+
+    def get_line(self, line):
         try:
-            return self.lines[self.line]
+            return self.lines[line]
         except IndexError:
             raise EOFError(
-                "EOF reading line {}".format(self.line)
+                "EOF reading line {}".format(line)
             )
 
+    @property
+    def current_line(self):
+        return self.get_line(self.line)
+
     @property
     def current_char(self):
         try:
@@ -70,3 +95,83 @@ class TextBuffer:
 
     def goto(self, line, column=0):
         self.line, self.column = line, column
+
+
+class MappedTextBuffer(TextBuffer):
+
+    """ A TextBuffer over bytes-like data, e.g. bytes or an mmap.
+
+    The data is neither decoded nor split as a whole. Lines are found
+    lazily while the buffer is read, only their start offsets are kept,
+    and only the current line is decoded. Offsets count characters, as
+    in TextBuffer, and the byte offsets of the lines are kept apart.
+    """
+
+    _newline = re.compile(b'\n')
+
+    def __init__(self, data=None, encoding='utf-8'):
+        self.encoding = encoding
+        super().__init__(data)
+
+    @classmethod
+    def from_file(cls, path, encoding='utf-8'):
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                data = b''
+        return cls(data, encoding)
+
+    def load(self, data):
+        self.text = data
+        self.byte_starts = array.array('q', [0] if data else [])
+        self.line_starts = array.array('q', [0] if data else [])
+        self.scanned = not data
+        self.decoded = (None, None)
+        self.reset()
+
+    def _scan_lines(self, line):
+        while not self.scanned and len(self.byte_starts) <= line + 1:
+            start = self.byte_starts[-1]
+            match = self._newline.search(self.text, start)
+            if match is None:
+                self.scanned = True
+                continue
+            # The length of the line in characters gives the next start
+            text = str(self.text[start:match.start()], self.encoding)
+            self.decoded = (len(self.byte_starts) - 1, text)
+            self.byte_starts.append(match.end())
+            self.line_starts.append(self.line_starts[-1] + len(text) + 1)
+
+    def _line_bounds(self, line):
+        self._scan_lines(line)
+        start = self.byte_starts[line]
+        if line + 1 < len(self.byte_starts):
+            return start, self.byte_starts[line + 1] - 1
+        return start, len(self.text)
+
+    def offset_of(self, line, column=0):
+        self._scan_lines(line)
+        if line < len(self.line_starts):
+            return self.line_starts[line] + column
+        if not self.line_starts:
+            return 0
+        last = len(self.line_starts) - 1
+        return self.line_starts[last] + len(self.get_line(last))
+
+    def get_line(self, line):
+        if self.decoded[0] == line:
+            return self.decoded[1]
+
+        try:
+            start, end = self._line_bounds(line)
+        except IndexError:
+            raise EOFError(
+                "EOF reading line {}".format(line)
+            )
+
+        # Scanning may have decoded the line already
+        if self.decoded[0] != line:
+            self.decoded = (line, str(self.text[start:end], self.encoding))
+        return self.decoded[1]
@@ -1,9 +1,12 @@
 class Token:
 
-    def __init__(self, _type, value=None, position=None):
+    __slots__ = ('type', 'value', 'position', 'offset')
+
+    def __init__(self, _type, value=None, position=None, offset=None):
         self.type = _type
         self.value = str(value) if value is not None else None
         self.position = position
+        self.offset = offset
 
     def __str__(self):
         if not self.position:
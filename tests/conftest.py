@@ -0,0 +1,29 @@
+import pytest
+
+from smallcalc import calc_parser as cpar
+
+
+@pytest.fixture
+def parse_line():
+    """
+    Returns a function parsing a single statement with PrattParser.
+    """
+    def parse_line(text):
+        p = cpar.PrattParser()
+        p.lexer.load(text)
+        return p.parse_line()
+
+    return parse_line
+
+
+@pytest.fixture
+def parse_program():
+    """
+    Returns a function parsing a whole text with PrattParser.
+    """
+    def parse_program(text):
+        p = cpar.PrattParser()
+        p.lexer.load(text)
+        return p.parse_program()
+
+    return parse_program
@@ -0,0 +1,35 @@
+from smallcalc import batch
+
+
+def test_evaluate_chunk():
+    assert batch.evaluate_chunk(['x = 2', '', 'x * 3.5']) == [
+        (None, None),
+        (7.0, 'float'),
+    ]
+
+
+def test_evaluate_lines_in_parallel_keeps_the_order():
+    lines = ['{} * 2'.format(i) for i in range(50)]
+
+    results = batch.evaluate_lines(lines, jobs=2, chunk_size=7)
+
+    assert results == [(i * 2, 'integer') for i in range(50)]
+
+
+def test_evaluate_lines_with_assignments_runs_in_order():
+    lines = ['x = 1'] + ['x = x + 1'] * 20 + ['x']
+
+    results = batch.evaluate_lines(lines, jobs=2, chunk_size=3)
+
+    assert results[-1] == (21, 'integer')
+
+
+def test_evaluate_file(tmpdir):
+    path = tmpdir.join('formulas.txt')
+    path.write('1 + 1\n2 ^ 3\n7 / 2\n')
+
+    assert batch.evaluate_file(str(path), jobs=2, chunk_size=1) == [
+        (2, 'integer'),
+        (8, 'integer'),
+        (3, 'integer'),
+    ]
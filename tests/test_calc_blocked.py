@@ -0,0 +1,95 @@
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from smallcalc import calc_blocked as cblk  # noqa: E402
+from smallcalc import calc_vectorized as cvec  # noqa: E402
+
+
+COLUMNS = {
+    'i': numpy.array([3, -7, 0, 12, 5, 9, -2]),
+    'j': numpy.array([2, 5, 3, 1, -4, -1, 3]),
+    'f': numpy.array([1.5, -0.25, 2.0, 10.0, 0.5, -3.0, 7.25]),
+}
+
+SAMPLES = [
+    "12",
+    "2 ^ -1 + 3",
+    "i + j * 3 - 1",
+    "i / j",
+    "-i / j",
+    "f / j + 2.0 / 4",
+    "i ^ 2",
+    "j ^ -1",
+    "i ^ j",
+    "f ^ j",
+    "-f * i + --j",
+    "(i + f) * j - i ^ 3 / 4",
+    "(i * j + (i - j) * (j - i)) * (f + i * (j + f))",
+]
+
+
+@pytest.mark.parametrize('text', SAMPLES)
+def test_blocked_evaluation_matches_vectorized(text, parse_line):
+    node = parse_line(text)
+    expected_values, expected_type = cvec.evaluate(node, **COLUMNS)
+
+    values, type = cblk.evaluate_blocked(node, block_size=3, **COLUMNS)
+
+    assert type == expected_type
+    assert len(values) == len(COLUMNS['i'])
+    assert numpy.array_equal(
+        values, numpy.broadcast_to(expected_values, values.shape))
+
+
+def test_blocked_evaluation_without_variables(parse_line):
+    values, type = cblk.evaluate_blocked(parse_line("2 * 3.5"))
+
+    assert list(values) == [7.0]
+    assert type == 'float'
+
+
+def test_blocked_evaluation_iterates_over_blocks(parse_line):
+    e = cblk.BlockedEvaluator(parse_line("i * 2"), block_size=3)
+
+    type, blocks = e.iter_blocks(i=numpy.arange(7))
+
+    assert type == 'integer'
+    assert [list(block) for block in blocks] == [
+        [0, 2, 4], [6, 8, 10], [12]
+    ]
+
+
+def test_blocked_evaluation_reuses_buffers(parse_line):
+    e = cblk.BlockedEvaluator(parse_line("(i + 1) * (i - 1) + i * i"))
+
+    steps, type = e._plan({'i': numpy.arange(10)})
+
+    buffers = set(id(buffer) for _, _, buffer in steps if buffer is not None)
+    assert len(buffers) == 2
+
+
+def test_blocked_evaluation_info(parse_line):
+    e = cblk.BlockedEvaluator(parse_line("i + 1"), block_size=4)
+
+    e.evaluate(i=numpy.arange(10))
+
+    info = e.info()
+    assert info.rows == 10
+    assert info.blocks == 3
+    assert info.rows_per_second > 0
+
+
+def test_blocked_evaluation_division_by_zero(parse_line):
+    with pytest.raises(ZeroDivisionError):
+        cblk.evaluate_blocked(parse_line("i / j"), i=[1, 2], j=[1, 0])
+
+
+def test_blocked_evaluation_columns_of_different_lengths(parse_line):
+    with pytest.raises(ValueError):
+        cblk.evaluate_blocked(parse_line("i + j"), i=[1, 2], j=[1])
+
+
+def test_blocked_evaluation_rejects_assignments(parse_line):
+    with pytest.raises(ValueError):
+        cblk.BlockedEvaluator(parse_line("x = 1"))
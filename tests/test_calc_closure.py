@@ -0,0 +1,46 @@
+import pytest
+
+from smallcalc import calc_closure as cclo
+
+
+def test_closure_formula_is_reusable(parse_line):
+    formula = cclo.compile_closure(parse_line("x * 2 + 1"))
+
+    assert formula({'x': {'type': 'integer', 'value': 3}}) == (7, 'integer')
+    assert formula({'x': {'type': 'float', 'value': 0.5}}) == (2.0, 'float')
+
+
+def test_closure_formula_assignment(parse_line):
+    formula = cclo.compile_closure(parse_line("y = 7 / 2"))
+    environment = {}
+
+    assert formula(environment) == (None, None)
+    assert environment == {'y': {'type': 'integer', 'value': 3}}
+
+
+def test_closure_formula_long_chain(parse_line):
+    formula = cclo.compile_closure(parse_line(' + '.join(['1'] * 5000)))
+
+    assert formula() == (5000, 'integer')
+
+
+def test_closure_formula_long_sign_run(parse_line):
+    formula = cclo.compile_closure(parse_line('-' * 3000 + '+-x'))
+
+    assert formula({'x': {'type': 'integer', 'value': 2}}) == (-2, 'integer')
+    assert cclo.compile_closure(parse_line('-' * 3001 + '1'))() == \
+        (-1, 'integer')
+
+
+def test_closure_formula_mixed_chain(parse_line):
+    formula = cclo.compile_closure(parse_line("x * 2 - 3 + x / 2 - 1.5 * x"))
+
+    assert formula({'x': {'type': 'integer', 'value': 5}}) == (1.5, 'float')
+
+
+def test_closure_formula_nested_right_operands_hit_recursion_limit(parse_line):
+    text = '1 + (' * 2000 + '1' + ')' * 2000
+    formula = cclo.compile_closure(parse_line(text))
+
+    with pytest.raises(RecursionError):
+        formula()
@@ -0,0 +1,20 @@
+from smallcalc import calc_compiler as ccom
+
+
+def test_compiled_formula_is_reusable(parse_line):
+    formula = ccom.compile_node(parse_line("x * 2 + 1"))
+
+    assert formula({'x': {'type': 'integer', 'value': 3}}) == (7, 'integer')
+    assert formula({'x': {'type': 'float', 'value': 0.5}}) == (2.0, 'float')
+
+
+def test_compiled_formula_source(parse_line):
+    formula = ccom.compile_node(parse_line("2 ^ 3 / 2.0"))
+
+    assert formula.source == (
+        "def formula(environment):\n"
+        "    t1 = (2) ** (3)\n"
+        "    t2 = t1 // (2.0)\n"
+        "    return (t2, 'float')\n"
+    )
+    assert formula() == (4.0, 'float')
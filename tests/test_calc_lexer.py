@@ -1,7 +1,10 @@
+import io
+
 import pytest
 
 from smallcalc import tok as token
 from smallcalc import calc_lexer as clex
+from smallcalc import text_buffer
 
 
 def test_get_tokens_understands_eof():
@@ -268,3 +271,233 @@ def test_get_tokens_understands_floats():
         token.Token(clex.EOL),
         token.Token(clex.EOF)
     ]
+
+def test_prelexed_lexer_tokenizes_on_load():
+    l = clex.PrelexedCalcLexer()
+
+    l.load('3 + 5')
+
+    assert l.tokens == [
+        token.Token(clex.INTEGER, '3'),
+        token.Token(clex.LITERAL, '+'),
+        token.Token(clex.INTEGER, '5'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_prelexed_lexer_get_tokens():
+    l = clex.PrelexedCalcLexer()
+
+    l.load('3 + 5')
+    l.get_token()
+
+    assert l.get_tokens() == [
+        token.Token(clex.LITERAL, '+'),
+        token.Token(clex.INTEGER, '5'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_prelexed_lexer_keeps_returning_eof():
+    l = clex.PrelexedCalcLexer()
+
+    l.load('')
+
+    assert l.get_token() == token.Token(clex.EOF)
+    assert l.get_token() == token.Token(clex.EOF)
+
+def test_prelexed_lexer_can_stash_and_pop_status():
+    l = clex.PrelexedCalcLexer()
+    l.load('3 5')
+
+    l.stash()
+    l.get_token()
+    l.pop()
+
+    assert l.get_token() == token.Token(clex.INTEGER, '3')
+
+def test_prelexed_lexer_can_peek_token():
+    l = clex.PrelexedCalcLexer()
+    l.load('3 + 5')
+
+    l.get_token()
+    assert l.peek_token() == token.Token(clex.LITERAL, '+')
+    assert l.get_token() == token.Token(clex.LITERAL, '+')
+
+def test_prelexed_lexer_as_context_manager_restores_the_status_if_token_error():
+    l = clex.PrelexedCalcLexer()
+    l.load('3 * 5')
+
+    with l:
+        l.get_token()
+        l.get_token()
+        raise clex.TokenError
+
+    assert l.get_token() == token.Token(clex.INTEGER, 3)
+
+def test_get_tokens_understands_multiple_lines():
+    l = clex.CalcLexer()
+
+    l.load('x=2.5\n  3y ')
+
+    assert l.get_tokens() == [
+        token.Token(clex.NAME, 'x'),
+        token.Token(clex.LITERAL, '='),
+        token.Token(clex.FLOAT, '2.5'),
+        token.Token(clex.EOL),
+        token.Token(clex.INTEGER, '3'),
+        token.Token(clex.NAME, 'y'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_lexer_reads_mapped_text_buffer():
+    l = clex.CalcLexer(text_buffer.MappedTextBuffer())
+
+    l.load(b'x = 3\n5')
+
+    assert l.get_tokens() == [
+        token.Token(clex.NAME, 'x'),
+        token.Token(clex.LITERAL, '='),
+        token.Token(clex.INTEGER, '3'),
+        token.Token(clex.EOL),
+        token.Token(clex.INTEGER, '5'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_stream_tokens_matches_get_tokens():
+    text = 'x = 3.5\n\n  y = x * (2 + 1)\nx ^ y\n'
+
+    l = clex.CalcLexer()
+    l.load(text)
+    expected = l.get_tokens()
+
+    chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+    tokens = list(clex.CalcLexer().stream_tokens(chunks))
+
+    assert tokens == expected
+    assert [t.offset for t in tokens] == [t.offset for t in expected]
+
+def test_stream_tokens_understands_empty_stream():
+    l = clex.CalcLexer()
+
+    assert list(l.stream_tokens([])) == [
+        token.Token(clex.EOF)
+    ]
+
+def test_stream_tokens_reads_file_objects():
+    l = clex.CalcLexer()
+
+    assert list(l.stream_tokens(io.StringIO('3\n5'))) == [
+        token.Token(clex.INTEGER, '3'),
+        token.Token(clex.EOL),
+        token.Token(clex.INTEGER, '5'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_stream_tokens_keeps_loaded_text():
+    l = clex.CalcLexer()
+    l.load('7')
+
+    list(l.stream_tokens(['3\n5']))
+
+    assert l.get_token() == token.Token(clex.INTEGER, '7')
+
+def test_stream_tokens_with_mapped_text_buffer():
+    l = clex.CalcLexer(text_buffer.MappedTextBuffer())
+
+    assert list(l.stream_tokens(['3\n5'])) == [
+        token.Token(clex.INTEGER, '3'),
+        token.Token(clex.EOL),
+        token.Token(clex.INTEGER, '5'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_get_tokens_records_offsets():
+    l = clex.CalcLexer()
+
+    l.load('x = 3\n  y')
+
+    assert [t.offset for t in l.get_tokens()] == [0, 2, 4, 5, 8, 9, 9]
+
+def test_lexer_locates_tokens():
+    l = clex.CalcLexer()
+    l.load('x = 3\n  y')
+
+    tokens = l.get_tokens()
+
+    assert l.locate(tokens[2]).position == (0, 4)
+    assert l.locate(tokens[4]).position == (1, 2)
+    assert str(tokens[4]) == "Token(NAME, 'y', line=1, col=2)"
+
+def test_discard_error_reports_position():
+    l = clex.CalcLexer()
+    l.load('3\n + 5')
+
+    l.get_token()
+    l.get_token()
+
+    with pytest.raises(clex.TokenError) as excinfo:
+        l.discard_type(clex.INTEGER)
+
+    assert 'line=1, col=1' in str(excinfo.value)
+
+def test_get_token_array():
+    l = clex.CalcLexer()
+
+    l.load('x = 3.6\ny ^ 2')
+
+    tokens = l.get_token_array()
+
+    assert len(tokens) == 9
+    assert tokens.type_of(2) == clex.FLOAT
+    assert tokens.value_of(2) == '3.6'
+    assert tokens.value_of(3) is None
+    assert tokens[4].offset == 8
+    assert list(tokens) == [
+        token.Token(clex.NAME, 'x'),
+        token.Token(clex.LITERAL, '='),
+        token.Token(clex.FLOAT, '3.6'),
+        token.Token(clex.EOL),
+        token.Token(clex.NAME, 'y'),
+        token.Token(clex.LITERAL, '^'),
+        token.Token(clex.INTEGER, '2'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_iter_tokens_is_a_generator():
+    l = clex.CalcLexer()
+    l.load('3 + 5')
+
+    tokens = l.iter_tokens()
+
+    assert next(tokens) == token.Token(clex.INTEGER, '3')
+    assert list(tokens) == [
+        token.Token(clex.LITERAL, '+'),
+        token.Token(clex.INTEGER, '5'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
+
+def test_iter_tokens_understands_eof():
+    l = clex.CalcLexer()
+
+    l.load('')
+
+    assert list(l.iter_tokens()) == [
+        token.Token(clex.EOF)
+    ]
+
+def test_prelexed_lexer_iter_tokens():
+    l = clex.PrelexedCalcLexer()
+    l.load('3')
+
+    assert list(l.iter_tokens()) == [
+        token.Token(clex.INTEGER, '3'),
+        token.Token(clex.EOL),
+        token.Token(clex.EOF)
+    ]
@@ -0,0 +1,76 @@
+from smallcalc import calc_optimizer as copt
+from smallcalc import calc_parser as cpar
+
+
+def test_optimizer_folds_constants(parse_line):
+    node, eliminated = copt.optimize(parse_line("2 * 3 ^ 4"))
+
+    assert node.asdict() == {'type': 'integer', 'value': 162}
+    assert eliminated == 4
+
+
+def test_optimizer_keeps_type_promotion(parse_line):
+    node, _ = copt.optimize(parse_line("2 * 1.5 + 1"))
+
+    assert node.asdict() == {'type': 'float', 'value': 4.0}
+
+
+def test_optimizer_does_not_fold_mistyped_results(parse_line):
+    node, eliminated = copt.optimize(parse_line("2 ^ -1"))
+
+    assert node.type == 'exponentiation'
+    assert node.right.asdict() == {'type': 'integer', 'value': -1}
+    assert eliminated == 1
+
+
+def test_optimizer_does_not_fold_errors(parse_line):
+    node, _ = copt.optimize(parse_line("x + 1 / 0"))
+
+    assert node.right.asdict() == parse_line("1 / 0").asdict()
+
+
+def test_optimizer_removes_identities(parse_line):
+    node, eliminated = copt.optimize(parse_line("x = --(y * 1 - 0) ^ 1"))
+
+    assert node.asdict() == {
+        'type': 'assignment',
+        'variable': 'x',
+        'value': {'type': 'variable', 'value': 'y'}
+    }
+    assert eliminated == 8
+
+
+def test_optimizer_keeps_identities_with_floats(parse_line):
+    text = "y * 1.0 - 0.0"
+
+    node, eliminated = copt.optimize(parse_line(text))
+
+    assert node.asdict() == parse_line(text).asdict()
+    assert eliminated == 0
+
+
+def test_optimizer_keeps_square_of_variables(parse_line):
+    # A float y * y overflows to inf where y ^ 2 raises OverflowError
+    node, eliminated = copt.optimize(parse_line("y ^ 2"))
+
+    assert node.asdict() == parse_line("y ^ 2").asdict()
+    assert eliminated == 0
+
+
+def test_optimizer_does_not_modify_the_input(parse_line):
+    original = parse_line("1 + 2 * x ^ 2")
+    ast = original.asdict()
+
+    copt.optimize(original)
+
+    assert original.asdict() == ast
+
+
+def test_optimizer_counts_eliminated_nodes_in_programs(parse_program):
+    p = cpar.PrattParser()
+    p.lexer.load("x = 1 + 2\nx * 1")
+
+    optimizer = copt.Optimizer()
+    optimizer.optimize(p.parse_program())
+
+    assert optimizer.eliminated == 4
@@ -1,4 +1,7 @@
+import pytest
+
 from smallcalc import calc_parser as cpar
+from smallcalc import calc_lexer as clex
 
 
 def test_parse_integer():
@@ -546,3 +549,198 @@ def test_parse_exponentiation_with_negative_base():
             'value': 2
         }
     }
+
+def test_parser_accepts_prelexed_lexer():
+    p = cpar.CalcParser(clex.PrelexedCalcLexer())
+    p.lexer.load("x = -(2 + 3) * 4 ^ 2")
+
+    node = p.parse_line()
+
+    q = cpar.CalcParser()
+    q.lexer.load("x = -(2 + 3) * 4 ^ 2")
+
+    assert node.asdict() == q.parse_line().asdict()
+
+def test_parse_error_reports_position():
+    p = cpar.CalcParser()
+    p.lexer.load("2 +\n")
+
+    with pytest.raises(cpar.TokenError) as excinfo:
+        p.parse_expression()
+
+    assert 'line=0, col=3' in str(excinfo.value)
+
+PRATT_PARSER_SAMPLES = [
+    "5",
+    "5.8",
+    "somevar",
+    "2 + 3 - 4",
+    "2 * 3 / 4 - 6 / 2 * 7",
+    "2 + 3 * 4",
+    "(2 + 3) * 4",
+    "-(2 + 3)",
+    "+-5 * --x",
+    "-2 ^ 2",
+    "(3 + 2) ^ 3 * 2 ^ -1",
+    "2 ^ 3 ^ 4",
+    "x = 4 * (3 + 5)",
+    "x = y",
+    "(x) = 5",
+]
+
+@pytest.mark.parametrize('text', PRATT_PARSER_SAMPLES)
+def test_pratt_parser_builds_the_same_ast(text):
+    p = cpar.CalcParser()
+    p.lexer.load(text)
+
+    q = cpar.PrattParser()
+    q.lexer.load(text)
+
+    assert q.parse_line().asdict() == p.parse_line().asdict()
+
+def test_pratt_parser_does_not_backtrack():
+    p = cpar.PrattParser()
+    p.lexer.load("x = -(2 + 3) * 4 ^ 2")
+
+    p.parse_line()
+
+    assert p.lexer.positions == []
+
+def test_pratt_parser_rejects_invalid_factor():
+    p = cpar.PrattParser()
+    p.lexer.load("2 * )")
+
+    with pytest.raises(cpar.TokenError):
+        p.parse_line()
+
+@pytest.mark.parametrize('text', PRATT_PARSER_SAMPLES)
+def test_packrat_parser_builds_the_same_ast(text):
+    p = cpar.CalcParser()
+    p.lexer.load(text)
+
+    q = cpar.CalcParser(packrat=True)
+    q.lexer.load(text)
+
+    assert q.parse_line().asdict() == p.parse_line().asdict()
+
+def test_packrat_parser_reuses_results():
+    p = cpar.CalcParser(packrat=True)
+    p.lexer.load("(2 + 3) * 4")
+
+    p.lexer.stash()
+    first = p.parse_expression()
+    p.lexer.pop()
+    second = p.parse_expression()
+
+    assert second is first
+    assert p.lexer.get_token().type == clex.EOL
+
+def test_packrat_parser_reuses_errors():
+    p = cpar.CalcParser(clex.PrelexedCalcLexer(), packrat=True)
+    p.lexer.load("2 * )")
+
+    with pytest.raises(cpar.TokenError) as first:
+        p.parse_expression()
+    p.lexer.goto(0)
+    with pytest.raises(cpar.TokenError) as second:
+        p.parse_expression()
+
+    assert second.value is first.value
+
+def test_packrat_parser_clears_memo_on_load():
+    p = cpar.CalcParser(packrat=True)
+    p.lexer.load("2 + 3")
+    p.parse_expression()
+
+    p.lexer.load("4 * 5")
+
+    assert p.parse_expression().asdict()['operator']['value'] == '*'
+
+def test_pratt_parser_deeply_nested_input():
+    depth = 50000
+    p = cpar.PrattParser()
+    p.lexer.load("-" * depth + "(" * depth + "x" + ")" * depth + " ^ 2")
+
+    node = p.parse_line()
+
+    assert isinstance(node, cpar.ExponentiationNode)
+    content = node.asdict()['left']
+    for _ in range(depth):
+        assert content['type'] == 'unary'
+        content = content['content']
+    assert content == {'type': 'variable', 'value': 'x'}
+
+def test_asdict_does_not_change_the_node():
+    p = cpar.PrattParser()
+    p.lexer.load("2 + 3")
+
+    node = p.parse_line()
+
+    assert node.asdict() == node.asdict()
+    assert isinstance(node.left, cpar.IntegerNode)
+
+def test_parse_program():
+    p = cpar.CalcParser()
+    p.lexer.load("x = 5\n\n x * 2\n")
+
+    node = p.parse_program()
+
+    assert node.asdict() == {
+        'type': 'program',
+        'statements': [
+            {
+                'type': 'assignment',
+                'variable': 'x',
+                'value': {
+                    'type': 'integer',
+                    'value': 5
+                }
+            },
+            {
+                'type': 'binary',
+                'left': {
+                    'type': 'variable',
+                    'value': 'x'
+                },
+                'right': {
+                    'type': 'integer',
+                    'value': 2
+                },
+                'operator': {
+                    'type': 'literal',
+                    'value': '*'
+                }
+            }
+        ]
+    }
+
+def test_parse_program_understands_empty_text():
+    p = cpar.PrattParser()
+    p.lexer.load("")
+
+    assert p.parse_program().asdict() == {
+        'type': 'program',
+        'statements': []
+    }
+
+def test_parse_program_rejects_unparsed_tokens():
+    p = cpar.PrattParser()
+    p.lexer.load("x = 5\n2 3")
+
+    with pytest.raises(cpar.TokenError):
+        p.parse_program()
+
+def test_nodes_are_compact():
+    p = cpar.PrattParser()
+    p.lexer.load("x = -(2 + 3.5) ^ 2")
+
+    node = p.parse_line()
+
+    assert not hasattr(node, '__dict__')
+    assert not hasattr(node.value, '__dict__')
+    assert node.value.operator == '^'
+    assert node.value.left.operator == '-'
+
+def test_node_fields():
+    assert cpar.BinaryNode.fields() == ('type', 'operator', 'left', 'right')
+    assert cpar.IntegerNode.fields() == ('type', 'value')
@@ -0,0 +1,59 @@
+import pytest
+
+from smallcalc import calc_validator as cval
+
+
+def test_validator_accepts_valid_text():
+    v = cval.CalcValidator()
+
+    assert v.validate('x = 5\n\ny = -(x + 2) ^ 2 * 3.5\nx / y\n') == []
+
+
+def test_validator_reports_every_line():
+    v = cval.CalcValidator()
+
+    errors = v.validate('x = \n2 * 3\n2 3\n(1 + 2\n$')
+
+    assert [(e.line, e.column) for e in errors] == [
+        (0, 4),
+        (2, 2),
+        (3, 6),
+        (4, 0),
+    ]
+
+
+def test_validator_reports_first_error_of_a_line():
+    v = cval.CalcValidator()
+
+    errors = v.validate('2 * * 3 )')
+
+    assert errors == [
+        cval.ValidationError(0, 4, "Expected a number, a variable or (, found Token(LITERAL, '*', line=0, col=4)")
+    ]
+
+
+@pytest.mark.parametrize('text', [
+    'x = y = 3',
+    '(x) = 3',
+    '2 ^ 3 ^ 4',
+    '2 ^ (3) ^ 4',
+    '.',
+    '2 +',
+    '())',
+])
+def test_validator_rejects_invalid_lines(text):
+    v = cval.CalcValidator()
+
+    assert len(v.validate(text)) == 1
+
+
+@pytest.mark.parametrize('text', [
+    '(2 ^ 3) ^ 4',
+    '2 ^ -(3) * 2 ^ 4',
+    '--x',
+    'x = (((y)))',
+])
+def test_validator_accepts_valid_lines(text):
+    v = cval.CalcValidator()
+
+    assert v.validate(text) == []
@@ -0,0 +1,66 @@
+import pytest
+
+from smallcalc import calc_visitor as cvis
+
+numpy = pytest.importorskip('numpy')
+
+from smallcalc import calc_vectorized as cvec  # noqa: E402
+
+
+ROWS = {
+    'i': [3, -7, 0, 12],
+    'j': [2, 5, -3, 1],
+    'f': [1.5, -0.25, 2.0, 10.0],
+}
+
+SAMPLES = [
+    "12",
+    "2.5 * 2",
+    "i + j * 3 - 1",
+    "i / j",
+    "-i / j",
+    "f / j",
+    "i / 2.0",
+    "i ^ 2",
+    "j ^ -1",
+    "f ^ j",
+    "-f * i + --j",
+    "(i + f) * j - i ^ 3 / 4",
+]
+
+
+@pytest.mark.parametrize('text', SAMPLES)
+def test_vectorized_evaluation_matches_visitor(text, parse_line):
+    node = parse_line(text)
+
+    values, type = cvec.evaluate(node, **ROWS)
+
+    values = numpy.broadcast_to(values, (len(ROWS['i']),))
+    for row, value in enumerate(values):
+        v = cvis.CalcVisitor()
+        for variable, column in ROWS.items():
+            is_float = isinstance(column[row], float)
+            v.environment[variable] = {
+                'type': 'float' if is_float else 'integer',
+                'value': column[row]
+            }
+        assert (value, type) == v.visit(node)
+
+
+def test_vectorized_division_by_zero(parse_line):
+    node = parse_line("i / j")
+
+    with pytest.raises(ZeroDivisionError):
+        cvec.evaluate(node, i=[1, 2], j=[1, 0])
+
+
+def test_vectorized_program(parse_program):
+    v = cvec.VectorizedVisitor()
+    v.bind('x', [1, 2, 3])
+
+    results = v.visit(parse_program("y = x * 2\ny + 0.5"))
+
+    assert results[0] == (None, None)
+    assert results[1][1] == 'float'
+    assert list(results[1][0]) == [2.5, 4.5, 6.5]
+    assert v.environment['y']['type'] == 'integer'
@@ -1,3 +1,6 @@
+import pytest
+
+from smallcalc import calc_parser as cpar
 from smallcalc import calc_visitor as cvis
 
 
@@ -258,3 +261,111 @@ def test_visitor_expression_sum_with_float():
 
     v = cvis.CalcVisitor()
     assert v.visit(ast) == (9.1, 'float')
+
+def test_visitor_assignment_of_expression():
+    assignment_ast = {
+        'type': 'assignment',
+        'variable': 'x',
+        'value': {
+            'type': 'binary',
+            'left': {
+                'type': 'integer',
+                'value': 2
+            },
+            'right': {
+                'type': 'float',
+                'value': 1.5
+            },
+            'operator': {
+                'type': 'literal',
+                'value': '*'
+            }
+        }
+    }
+
+    v = cvis.CalcVisitor()
+    v.visit(assignment_ast)
+
+    assert v.valueof('x') == 3.0
+    assert v.typeof('x') == 'float'
+
+def test_visitor_deeply_nested_ast():
+    ast = {
+        'type': 'integer',
+        'value': 1
+    }
+    for _ in range(100000):
+        ast = {
+            'type': 'unary',
+            'operator': {
+                'type': 'literal',
+                'value': '-'
+            },
+            'content': ast
+        }
+
+    v = cvis.CalcVisitor()
+    assert v.visit(ast) == (1, 'integer')
+
+def test_visitor_program():
+    ast = {
+        'type': 'program',
+        'statements': [
+            {
+                'type': 'assignment',
+                'variable': 'x',
+                'value': {
+                    'type': 'integer',
+                    'value': 5
+                }
+            },
+            {
+                'type': 'binary',
+                'left': {
+                    'type': 'variable',
+                    'value': 'x'
+                },
+                'right': {
+                    'type': 'integer',
+                    'value': 2
+                },
+                'operator': {
+                    'type': 'literal',
+                    'value': '*'
+                }
+            }
+        ]
+    }
+
+    v = cvis.CalcVisitor()
+    assert v.visit(ast) == [(None, None), (10, 'integer')]
+
+NODE_SAMPLES = [
+    "12",
+    "12.345",
+    "5 + 4 - 200 * 3",
+    "11 / 4",
+    "-(2 + 3)",
+    "+(2 + 3)",
+    "2 ^ 3",
+    "-2 ^ 2 * 3.5",
+    "2 ^ -1",
+]
+
+@pytest.mark.parametrize('text', NODE_SAMPLES)
+def test_visitor_evaluates_nodes_like_dictionaries(text):
+    p = cpar.PrattParser()
+    p.lexer.load(text)
+    node = p.parse_line()
+
+    v = cvis.CalcVisitor()
+    assert v.visit(node) == v.visit(node.asdict())
+
+def test_visitor_evaluates_program_nodes():
+    p = cpar.PrattParser()
+    p.lexer.load("x = 5\ny = x * 2.5\ny - x")
+    node = p.parse_program()
+
+    v = cvis.CalcVisitor()
+    assert v.visit(node) == [(None, None), (None, None), (7.5, 'float')]
+    assert v.typeof('y') == 'float'
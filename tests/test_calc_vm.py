@@ -0,0 +1,33 @@
+import pickle
+
+from smallcalc import calc_vm as cvm
+
+
+def test_compile_bytecode(parse_line):
+    program = cvm.compile_bytecode(parse_line("x = -y * 2"))
+
+    assert list(program.code) == [
+        cvm.LOAD_VARIABLE, 0,
+        cvm.NEG, 0,
+        cvm.PUSH_CONSTANT, 0,
+        cvm.MUL, 0,
+        cvm.STORE, 1,
+    ]
+    assert program.names == ['y', 'x']
+    assert program.constants == [(2, False)]
+
+
+def test_program_can_be_pickled(parse_program):
+    program = cvm.compile_bytecode(parse_program("x = 2.5\nx * 4 / 3"))
+
+    copy = pickle.loads(pickle.dumps(program))
+
+    assert list(copy.code) == list(program.code)
+    assert copy() == [(None, None), (3.0, 'float')]
+
+
+def test_program_is_reusable(parse_line):
+    program = cvm.compile_bytecode(parse_line("x ^ 2"))
+
+    assert program({'x': {'type': 'integer', 'value': 3}}) == (9, 'integer')
+    assert program({'x': {'type': 'float', 'value': 0.5}}) == (0.25, 'float')
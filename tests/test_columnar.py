@@ -0,0 +1,128 @@
+import io
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from smallcalc import columnar  # noqa: E402
+
+
+CSV = "x, y, f\n3,2,1.5\n-7,5,0.25\n10,3,2\n0,1,-1.0\n4,4,8.0\n"
+
+
+def test_parse_formula():
+    node = columnar.parse_formula("x * 2")
+
+    assert node.asdict()['type'] == 'binary'
+
+
+def test_parse_formula_rejects_many_statements():
+    with pytest.raises(ValueError):
+        columnar.parse_formula("x * 2\ny")
+
+
+def test_parse_columns():
+    dtype = columnar.parse_columns('x:int64, y:float32,z')
+
+    assert dtype.names == ('x', 'y', 'z')
+    assert [dtype[name] for name in dtype.names] == [
+        numpy.dtype('int64'), numpy.dtype('float32'), numpy.dtype('float64')
+    ]
+
+
+def test_read_csv_in_chunks():
+    chunks = list(columnar.read_csv(io.StringIO(CSV), chunk_rows=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[0].dtype.names == ('x', 'y', 'f')
+    assert chunks[0]['x'].dtype.kind == 'f'
+    assert chunks[0]['f'].dtype.kind == 'f'
+    assert list(chunks[1]['x']) == [10.0, 0.0]
+
+
+def test_read_csv_with_declared_columns():
+    chunks = list(columnar.read_csv(io.StringIO(CSV), 'x:int64,y:int32'))
+
+    assert chunks[0]['x'].dtype == numpy.dtype('int64')
+    assert chunks[0]['y'].dtype == numpy.dtype('int32')
+    assert chunks[0]['f'].dtype == numpy.dtype('float64')
+
+
+def test_read_csv_with_unknown_declared_column():
+    with pytest.raises(ValueError):
+        list(columnar.read_csv(io.StringIO(CSV), 'z:int64'))
+
+
+def test_read_csv_column_of_mixed_types():
+    chunks = list(columnar.read_csv(
+        io.StringIO("x,y\n1,2\n3.5,4\n"), chunk_rows=1))
+
+    assert [list(chunk['x']) for chunk in chunks] == [[1.0], [3.5]]
+
+
+def test_read_csv_without_rows():
+    assert list(columnar.read_csv(io.StringIO("x,y\n"))) == []
+
+
+def test_read_binary_in_chunks():
+    dtype = columnar.parse_columns('x:int64,f:float64')
+    records = numpy.zeros(5, dtype)
+    records['x'] = numpy.arange(5)
+
+    chunks = [
+        list(chunk['x'])
+        for chunk in columnar.read_binary(
+            io.BytesIO(records.tobytes()), dtype, chunk_rows=2)
+    ]
+
+    assert chunks == [[0, 1], [2, 3], [4]]
+
+
+def test_read_binary_truncated_record():
+    dtype = columnar.parse_columns('x:int64')
+
+    with pytest.raises(ValueError):
+        list(columnar.read_binary(io.BytesIO(b'\0' * 12), dtype))
+
+
+def test_evaluate_csv(tmpdir):
+    source = tmpdir.join('input.csv')
+    source.write(CSV)
+    target = tmpdir.join('output.csv')
+
+    info = columnar.evaluate_csv(
+        "x / y + f * z", str(source), str(target), 'x:int64,y:int64',
+        bindings={'z': 'y'}, chunk_rows=2, block_size=1)
+
+    assert target.read().split() == [
+        '4.0', '-0.75', '9.0', '-1.0', '33.0'
+    ]
+    assert info.rows == 5
+    assert info.blocks == 5
+
+
+def test_evaluate_csv_without_declared_columns(tmpdir):
+    source = tmpdir.join('input.csv')
+    source.write("x,y\n1,2\n3.5,4\n")
+    target = tmpdir.join('output.csv')
+
+    columnar.evaluate_csv("x * y", str(source), str(target), chunk_rows=1)
+
+    assert target.read().split() == ['2.0', '14.0']
+
+
+def test_evaluate_binary(tmpdir):
+    dtype = columnar.parse_columns('x:int64,y:int64')
+    records = numpy.zeros(5, dtype)
+    records['x'] = numpy.arange(5)
+    records['y'] = 3
+    source = tmpdir.join('input.bin')
+    source.write_binary(records.tobytes())
+    target = tmpdir.join('output.bin')
+
+    info = columnar.evaluate_binary(
+        "x ^ 2 - y", str(source), str(target), 'x:int64,y:int64',
+        chunk_rows=2)
+
+    assert list(numpy.fromfile(str(target), 'int64')) == [-3, -2, 1, 6, 13]
+    assert info.rows == 5
@@ -0,0 +1,95 @@
+from smallcalc import calc_parser as cpar
+from smallcalc import incremental_parser as ipar
+
+
+def _parse_line(text):
+    p = cpar.CalcParser()
+    p.lexer.load(text)
+
+    return p.parse_line().asdict()
+
+
+def test_incremental_parser_parses_all_lines():
+    p = ipar.IncrementalParser('x = 5\n\ny * 2')
+
+    assert len(p.nodes) == 3
+    assert p.nodes[0].asdict() == _parse_line('x = 5')
+    assert p.nodes[1] is None
+    assert p.nodes[2].asdict() == _parse_line('y * 2')
+
+
+def test_incremental_parser_edit_reuses_other_lines():
+    p = ipar.IncrementalParser('x = 5\ny = 6\nz = 7')
+    first, last = p.nodes[0], p.nodes[2]
+    first_tokens = p.tokens[0]
+
+    changed = p.edit(10, 1, '8 + 1')
+
+    assert list(changed) == [1]
+    assert p.text == 'x = 5\ny = 8 + 1\nz = 7'
+    assert p.nodes[0] is first
+    assert p.tokens[0] is first_tokens
+    assert p.nodes[2] is last
+    assert p.nodes[1].asdict() == _parse_line('y = 8 + 1')
+
+
+def test_incremental_parser_edit_across_lines():
+    p = ipar.IncrementalParser('x = 5\ny = 6\nz = 7')
+
+    changed = p.edit(4, 8, '1\nw = 2\nv = 3;')
+
+    assert list(changed) == [0, 1, 2]
+    assert p.text == 'x = 1\nw = 2\nv = 3;z = 7'
+    assert p.nodes[1].asdict() == _parse_line('w = 2')
+    assert p.nodes[2] is None
+    assert p.errors[2] is not None
+
+
+def test_incremental_parser_edit_keeps_line_offsets():
+    p = ipar.IncrementalParser('x = 5\ny = 6\nz = 7')
+
+    p.edit(0, 0, 'a = 1\n')
+    p.edit(22, 1, '9')
+
+    assert p.text == 'a = 1\nx = 5\ny = 6\nz = 9'
+    assert p.nodes[3].asdict() == _parse_line('z = 9')
+    assert p.line_starts == [0, 6, 12, 18]
+
+
+def test_incremental_parser_edit_computes_line_offsets_lazily():
+    p = ipar.IncrementalParser('\n'.join(['x = 1'] * 1000))
+
+    p.edit(4, 1, '22')
+
+    assert p._valid_starts <= 1
+    assert p.line_start(999) == 999 * 6 + 1
+    p.edit(999 * 6 + 5, 1, '3')
+    assert p.text.endswith('x = 1\nx = 3')
+    assert p.line_start(1) == 7
+
+
+def test_incremental_parser_edit_records_invalid_number():
+    p = ipar.IncrementalParser('1+\n2')
+
+    p.edit(2, 0, '.')
+
+    assert p.text == '1+.\n2'
+    assert p.nodes[0] is None
+    assert 'Invalid number' in str(p.errors[0])
+    assert p.nodes[1].asdict() == _parse_line('2')
+
+
+def test_incremental_parser_rejects_unclosed_group():
+    p = ipar.IncrementalParser('((y')
+
+    assert p.nodes[0] is None
+    assert p.errors[0] is not None
+
+
+def test_incremental_parser_parses_deep_nesting():
+    p = ipar.IncrementalParser(
+        '(' * 5000 + '1' + ')' * 5000 + '+2\n' + '-' * 5000 + '1')
+
+    assert p.errors == [None, None]
+    assert p.nodes[0].asdict()['type'] == 'binary'
+    assert p.nodes[1].asdict()['type'] == 'unary'
@@ -0,0 +1,100 @@
+import pytest
+
+from smallcalc import calc_optimizer as copt
+from smallcalc import calc_parser as cpar
+from smallcalc import calc_visitor as cvis
+from smallcalc import node_interner as nint
+
+
+def test_interner_shares_equal_subtrees(parse_line):
+    i = nint.NodeInterner()
+
+    node = i.intern(parse_line('(a + b) * c - (a + b) * c'))
+
+    assert node.left is node.right
+    assert node.left.left.left is node.right.left.left
+    # a, b, c, a + b, (a + b) * c and the subtraction
+    assert len(i) == 6
+
+
+def test_interner_shares_nodes_between_trees(parse_line):
+    i = nint.NodeInterner()
+
+    first = i.intern(parse_line('x * 2 + 1'))
+    second = i.intern(parse_line('(x * 2) ^ 3'))
+
+    assert first.left is second.left
+    assert i.hash(first.left) == i.hash(second.left)
+
+
+def test_interner_keeps_different_subtrees_apart(parse_line):
+    i = nint.NodeInterner()
+
+    node = i.intern(parse_line('1 + 1.0 + -1.0'))
+
+    assert node.left.left is not node.left.right
+    assert node.left.right is node.right.content
+    assert i.hash(node.left.left) != i.hash(node.left.right)
+
+
+def test_interner_hash_is_structural(parse_line):
+    first = nint.NodeInterner()
+    second = nint.NodeInterner()
+
+    a = first.intern(parse_line('x = (a + b) * c'))
+    b = second.intern(parse_line('x = (a + b) * c'))
+
+    assert a is not b
+    assert first.hash(a) == second.hash(b)
+
+
+def test_interned_tree_evaluates_like_the_original(parse_program):
+    p = cpar.PrattParser()
+    p.lexer.load('x = 3\ny = (x + 1) * (x + 1)\ny - (x + 1)')
+    program = p.parse_program()
+
+    node = nint.NodeInterner().intern(program)
+
+    assert node.asdict() == program.asdict()
+    assert cvis.CalcVisitor().visit(node) == cvis.CalcVisitor().visit(program)
+
+
+def test_interned_nodes_are_frozen(parse_line):
+    node = nint.NodeInterner().intern(parse_line('(a + b) * (a + b)'))
+
+    with pytest.raises(AttributeError):
+        node.left = cpar.IntegerNode(1)
+    with pytest.raises(AttributeError):
+        del node.left.right
+    assert isinstance(node, cpar.BinaryNode)
+    assert node.asdict() == parse_line('(a + b) * (a + b)').asdict()
+
+
+def test_interned_program_statements_are_a_tuple(parse_program):
+    p = cpar.PrattParser()
+    p.lexer.load('x = 1\nx + 1')
+
+    node = nint.NodeInterner().intern(p.parse_program())
+
+    assert isinstance(node.statements, tuple)
+
+
+def test_interned_nodes_carry_their_hash(parse_line):
+    i = nint.NodeInterner()
+
+    node = i.intern(parse_line('x * 2 + 1'))
+
+    assert node.structural_hash == i.hash(node)
+    assert nint.NodeInterner().intern(node) is not node
+    assert nint.NodeInterner().intern(node).structural_hash == \
+        node.structural_hash
+    assert i.intern(node) is node
+
+
+def test_interned_trees_can_be_optimized(parse_line):
+    node = nint.NodeInterner().intern(parse_line('x * 1 + 2 ^ 3'))
+
+    optimized, eliminated = copt.optimize(node)
+
+    assert optimized.asdict() == parse_line('x + 8').asdict()
+    assert eliminated == 4
@@ -0,0 +1,58 @@
+import pytest
+
+from smallcalc import calc_lexer as clex
+from smallcalc import calc_visitor as cvis
+from smallcalc import parse_cache as pcac
+
+
+def test_parse_cache_returns_the_same_node():
+    c = pcac.ParseCache()
+
+    node = c.parse('x * 2 + 1')
+
+    assert c.parse('x * 2 + 1') is node
+    assert c.info() == pcac.CacheInfo(hits=1, misses=1, maxsize=1024, currsize=1)
+
+
+def test_parse_cache_evicts_least_recently_used():
+    c = pcac.ParseCache(maxsize=2)
+
+    first = c.parse('1')
+    c.parse('2')
+    c.parse('1')
+    c.parse('3')
+
+    assert c.parse('1') is first
+    assert '2' not in c.nodes
+    assert c.info() == pcac.CacheInfo(hits=2, misses=3, maxsize=2, currsize=2)
+
+
+def test_parse_cache_does_not_store_errors():
+    c = pcac.ParseCache()
+
+    with pytest.raises(clex.TokenError):
+        c.parse('2 3')
+
+    assert c.info().currsize == 0
+
+
+def test_parse_cache_nodes_are_not_changed_by_evaluation():
+    c = pcac.ParseCache()
+    v = cvis.CalcVisitor()
+    node = c.parse('x = 2 * (3 + 4)')
+    ast = node.asdict()
+
+    v.visit(node.asdict())
+    v.visit(c.parse('x = 2 * (3 + 4)').asdict())
+
+    assert node.asdict() == ast
+    assert v.valueof('x') == 14
+
+
+def test_parse_cache_clear():
+    c = pcac.ParseCache()
+    c.parse('1')
+
+    c.clear()
+
+    assert c.info() == pcac.CacheInfo(hits=0, misses=0, maxsize=1024, currsize=0)
@@ -0,0 +1,115 @@
+import pytest
+
+from smallcalc import calc_closure as cclo
+from smallcalc import calc_compiler as ccom
+from smallcalc import calc_optimizer as copt
+from smallcalc import calc_visitor as cvis
+from smallcalc import calc_vm as cvm
+
+
+def _visit(node, environment):
+    v = cvis.CalcVisitor()
+    v.environment = environment
+    return v.visit(node)
+
+
+def _compiled(node, environment):
+    return ccom.compile_node(node)(environment)
+
+
+def _closure(node, environment):
+    return cclo.compile_closure(node)(environment)
+
+
+def _bytecode(node, environment):
+    return cvm.compile_bytecode(node)(environment)
+
+
+def _optimized(node, environment):
+    return _visit(copt.optimize(node)[0], environment)
+
+
+EVALUATORS = [
+    _visit,
+    _compiled,
+    _closure,
+    _bytecode,
+    _optimized,
+]
+
+SAMPLES = [
+    ("12", (12, 'integer')),
+    ("12.5", (12.5, 'float')),
+    ("5 + 4 * 3 - 1", (16, 'integer')),
+    ("11 / 4", (2, 'integer')),
+    ("-11 / 4", (-3, 'integer')),
+    ("11.0 / 4", (2.0, 'float')),
+    ("2 ^ 10", (1024, 'integer')),
+    ("2 ^ -1", (0.5, 'integer')),
+    ("-2 ^ 2", (4, 'integer')),
+    ("2 ^ 0.5 * 0", (0.0, 'float')),
+    ("5.1 + 4", (9.1, 'float')),
+    ("+(2 + 3)", (5, 'integer')),
+    ("--3", (3, 'integer')),
+    ("i * 2", (6, 'integer')),
+    ("i * f", (4.5, 'float')),
+    ("i / 2 + f", (2.5, 'float')),
+    ("-f ^ i", (-3.375, 'float')),
+    ("i * 1 - 0 + 0 * f", (3.0, 'float')),
+    ("f ^ 1 * 1.0 ^ 2", (1.5, 'float')),
+    ("--i ^ 2 + +f", (10.5, 'float')),
+    ("2 * 3 ^ 4", (162, 'integer')),
+    ("i / 1.0", (3.0, 'float')),
+]
+
+ENVIRONMENT = {
+    'i': {'type': 'integer', 'value': 3},
+    'f': {'type': 'float', 'value': 1.5},
+}
+
+
+@pytest.mark.parametrize('evaluate', EVALUATORS)
+@pytest.mark.parametrize('text,expected', SAMPLES)
+def test_expression_semantics(evaluate, text, expected, parse_line):
+    node = parse_line(text)
+
+    assert evaluate(node, dict(ENVIRONMENT)) == expected
+
+
+@pytest.mark.parametrize('evaluate', EVALUATORS)
+def test_program_semantics(evaluate, parse_program):
+    node = parse_program("x = 4\ny = x / 3 * 1.0\nx ^ 2 + y")
+    environment = {}
+
+    assert evaluate(node, environment) == [
+        (None, None),
+        (None, None),
+        (17.0, 'float'),
+    ]
+    assert environment == {
+        'x': {'type': 'integer', 'value': 4},
+        'y': {'type': 'float', 'value': 1.0},
+    }
+
+
+@pytest.mark.parametrize('evaluate', EVALUATORS)
+def test_division_by_zero(evaluate, parse_line):
+    node = parse_line("1 / 0")
+
+    with pytest.raises(ZeroDivisionError):
+        evaluate(node, {})
+
+
+@pytest.mark.parametrize('evaluate', EVALUATORS)
+def test_undefined_variable(evaluate, parse_line):
+    node = parse_line("x + 1")
+
+    with pytest.raises(KeyError):
+        evaluate(node, {})
+
+
+@pytest.mark.parametrize('evaluate', EVALUATORS)
+def test_long_expression(evaluate, parse_line):
+    node = parse_line(' + '.join(['1'] * 1000))
+
+    assert evaluate(node, {}) == (1000, 'integer')
@@ -113,3 +113,111 @@ def test_text_buffer_goto_default_column():
     tb.goto(12)
 
     assert tb.position == (12, 0)
+
+
+def test_mapped_text_buffer_init_empty():
+    tb = text_buffer.MappedTextBuffer()
+
+    with pytest.raises(text_buffer.EOFError):
+        tb.current_char
+
+
+def test_mapped_text_buffer_multiple_lines():
+    tb = text_buffer.MappedTextBuffer(b'abc\ndef\nghi')
+    tb.line = 1
+    tb.column = 1
+
+    assert tb.current_line == 'def'
+    assert tb.current_char == 'e'
+    assert tb.next_char == 'f'
+
+    tb.newline()
+    assert tb.current_line == 'ghi'
+
+
+def test_mapped_text_buffer_error_at_end_of_file():
+    tb = text_buffer.MappedTextBuffer(b'abc\n')
+    tb.line = 1
+
+    assert tb.current_line == ''
+
+    tb.line = 2
+    with pytest.raises(text_buffer.EOFError):
+        tb.current_line
+
+
+def test_mapped_text_buffer_end_of_line():
+    tb = text_buffer.MappedTextBuffer(memoryview(b'abcdef'))
+    tb.column = 5
+
+    assert tb.current_char == 'f'
+    with pytest.raises(text_buffer.EOLError):
+        tb.next_char
+
+
+def test_mapped_text_buffer_decodes_lines():
+    tb = text_buffer.MappedTextBuffer('città\nè'.encode('utf-8'))
+
+    assert tb.current_line == 'città'
+    tb.newline()
+    assert tb.current_line == 'è'
+
+
+def test_mapped_text_buffer_from_file(tmpdir):
+    path = tmpdir.join('formulas.txt')
+    path.write('x = 5\ny')
+
+    tb = text_buffer.MappedTextBuffer.from_file(str(path))
+
+    assert tb.current_line == 'x = 5'
+    tb.goto(1)
+    assert tb.current_line == 'y'
+
+
+def test_mapped_text_buffer_from_empty_file(tmpdir):
+    path = tmpdir.join('empty.txt')
+    path.write('')
+
+    tb = text_buffer.MappedTextBuffer.from_file(str(path))
+
+    with pytest.raises(text_buffer.EOFError):
+        tb.current_line
+
+
+def test_text_buffer_offset_of():
+    tb = text_buffer.TextBuffer('abc\ndef\nghi')
+
+    assert tb.offset_of(0, 2) == 2
+    assert tb.offset_of(2, 1) == 9
+    assert tb.offset_of(3) == 11
+
+
+def test_text_buffer_position_of():
+    tb = text_buffer.TextBuffer('abc\ndef\nghi')
+
+    assert tb.position_of(0) == (0, 0)
+    assert tb.position_of(3) == (0, 3)
+    assert tb.position_of(4) == (1, 0)
+    assert tb.position_of(10) == (2, 2)
+
+
+def test_mapped_text_buffer_position_of():
+    tb = text_buffer.MappedTextBuffer(b'abc\ndef')
+    tb.goto(1)
+    tb.current_line
+
+    assert tb.offset_of(1, 2) == 6
+    assert tb.position_of(6) == (1, 2)
+
+
+def test_mapped_text_buffer_offsets_count_characters():
+    text = 'é+1\nab\nè'
+    tb = text_buffer.MappedTextBuffer(text.encode('utf-8'))
+    expected = text_buffer.TextBuffer(text)
+
+    assert tb.offset_of(1) == expected.offset_of(1) == 4
+    assert tb.offset_of(2) == expected.offset_of(2) == 7
+    assert tb.offset_of(3) == expected.offset_of(3) == 8
+    assert tb.position_of(5) == expected.position_of(5) == (1, 1)
+    tb.goto(2)
+    assert tb.current_line == 'è'
@@ -97,3 +97,9 @@ def test_token_string_representation_with_position():
     t = token.Token('sometype', 'somevalue', position=(12, 34))
 
     assert str(t) == "Token(sometype, 'somevalue', line=12, col=34)"
+
+
+def test_token_has_no_instance_dictionary():
+    t = token.Token('sometype', 'somevalue')
+
+    assert not hasattr(t, '__dict__')